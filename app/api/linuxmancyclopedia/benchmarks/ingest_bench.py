@@ -0,0 +1,216 @@
+#! /usr/bin/env python3
+"""Benchmark the ingest stages on a pinned man/TLDR fixture corpus.
+
+The man sample is pinned by path and sha256 in ``fixtures/man_pages.json`` and
+copied out of the man page dump into a scratch tree before timing; the TLDR
+sample lives in ``fixtures/tldr``. Embedding uses a hashing stand-in model and
+an in-memory Qdrant, so the suite needs neither network nor model weights.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+
+from app.api.linuxmancyclopedia import ingest  # noqa: E402
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURE_DIR = BENCH_DIR / "fixtures"
+FIXTURE_MANIFEST = FIXTURE_DIR / "man_pages.json"
+FIXTURE_TLDR_ROOT = FIXTURE_DIR / "tldr"
+SCRATCH_MAN_ROOT = BENCH_DIR / ".corpus" / "man"
+FIXTURE_COMMANDS = (
+    "chmod", "cp", "find", "grep", "gzip", "kill", "less",
+    "ls", "mv", "ps", "sed", "ssh", "systemctl", "tar",
+)
+FIXTURE_SAMPLE_SIZE = 200
+
+
+class HashingEmbedder:
+    """Deterministic stand-in for SentenceTransformer: sha256-seeded unit vectors."""
+
+    def __init__(self, dim: int = 32, max_seq_length: int = 512):
+        self.dim = dim
+        self.max_seq_length = max_seq_length
+        self.tokenizer = self._tokenize
+
+    def _tokenize(self, texts: Sequence[str], **_: object) -> Dict[str, List[List[int]]]:
+        return {
+            "input_ids": [[0] * min(self.max_seq_length, len(text.split()) + 2) for text in texts]
+        }
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts: Sequence[str], **_: object) -> np.ndarray:
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vectors[row] = np.random.default_rng(seed).standard_normal(self.dim)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark ingest stages on the fixture corpus.")
+    parser.add_argument("--man-root", type=Path, default=ingest.DEFAULT_MAN_ROOT)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; best is kept.")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Write the JSON report here (default: print it).",
+    )
+    parser.add_argument(
+        "--refresh-fixture",
+        action="store_true",
+        help="Re-pin the man sample from --man-root instead of benchmarking.",
+    )
+    return parser.parse_args()
+
+
+def refresh_fixture(man_root: Path) -> None:
+    paths = sorted(ingest.discover_man_files(man_root))
+    step = max(1, len(paths) // FIXTURE_SAMPLE_SIZE)
+    chosen = set(paths[::step][:FIXTURE_SAMPLE_SIZE])
+    chosen.update(path for path in paths if ingest.command_from_path(path) in FIXTURE_COMMANDS)
+    pages = [
+        {"path": str(path.relative_to(man_root)), "sha256": ingest.file_digest(path)}
+        for path in sorted(chosen)
+    ]
+    FIXTURE_MANIFEST.write_text(json.dumps({"pages": pages}, indent=1) + "\n", encoding="utf-8")
+    print(f"Pinned {len(pages)} man pages in {FIXTURE_MANIFEST.relative_to(ingest.REPO_ROOT)}.")
+
+
+def materialize_fixture(man_root: Path) -> Path:
+    """Copy the pinned man pages into the scratch tree, verifying each hash."""
+    pages = json.loads(FIXTURE_MANIFEST.read_text(encoding="utf-8"))["pages"]
+    shutil.rmtree(SCRATCH_MAN_ROOT, ignore_errors=True)
+    for page in pages:
+        source = man_root / page["path"]
+        if not source.is_file() or ingest.file_digest(source) != page["sha256"]:
+            raise SystemExit(
+                f"Fixture page {page['path']} is missing or changed under {man_root}; "
+                "re-pin it with --refresh-fixture."
+            )
+        target = SCRATCH_MAN_ROOT / page["path"]
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, target)
+    return SCRATCH_MAN_ROOT
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def stage(seconds: float, items: int, size: int) -> Dict[str, float]:
+    return {
+        "seconds": round(seconds, 6),
+        "items": items,
+        "bytes": size,
+        "items_per_sec": round(items / seconds, 2) if seconds else 0.0,
+        "mb_per_sec": round(size / 1e6 / seconds, 3) if seconds else 0.0,
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ingest.REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(man_root: Path, repeat: int, batch_size: int) -> Dict[str, Dict[str, float]]:
+    stages: Dict[str, Dict[str, float]] = {}
+
+    seconds, paths = best_of(repeat, lambda: sorted(ingest.discover_man_files(man_root)))
+    raw_bytes = sum(path.stat().st_size for path in paths)
+    stages["discover_man_files"] = stage(seconds, len(paths), raw_bytes)
+
+    seconds, texts = best_of(repeat, lambda: [ingest.read_man_file(path) for path in paths])
+    stages["read_man_file"] = stage(seconds, len(paths), raw_bytes)
+
+    text_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    seconds, _ = best_of(repeat, lambda: [ingest.extract_sections(text) for text in texts])
+    stages["extract_sections"] = stage(seconds, len(texts), text_bytes)
+
+    tldr_files = sorted(FIXTURE_TLDR_ROOT.rglob("*.md"))
+    seconds, tldr_index = best_of(repeat, lambda: ingest.load_tldr_corpus(FIXTURE_TLDR_ROOT))
+    stages["load_tldr_corpus"] = stage(
+        seconds, len(tldr_files), sum(path.stat().st_size for path in tldr_files)
+    )
+
+    man_index = ingest.parse_man_pages(paths, man_root)
+    seconds, documents = best_of(repeat, lambda: ingest.build_documents(man_index, tldr_index))
+    doc_bytes = sum(len(doc.text.encode("utf-8")) for doc in documents)
+    stages["build_documents"] = stage(seconds, len(documents), doc_bytes)
+
+    model = HashingEmbedder()
+
+    def embed() -> None:
+        client = QdrantClient(":memory:")
+        ingest.ensure_collection(client, "bench", model.get_sentence_embedding_dimension())
+        ingest.embed_and_upsert(model, client, "bench", documents, batch_size)
+
+    seconds, _ = best_of(repeat, embed)
+    stages["embed_and_upsert"] = stage(seconds, len(documents), doc_bytes)
+    return stages
+
+
+def main() -> None:
+    args = parse_args()
+    if args.refresh_fixture:
+        refresh_fixture(args.man_root)
+        return
+    man_root = materialize_fixture(args.man_root)
+    try:
+        stages = run_benchmarks(man_root, args.repeat, args.batch_size)
+    finally:
+        shutil.rmtree(SCRATCH_MAN_ROOT.parent, ignore_errors=True)
+
+    for name, result in stages.items():
+        print(
+            f"{name:>20}: {result['seconds']:8.4f}s  {result['items']:6d} items  "
+            f"{result['items_per_sec']:10,.1f} items/s  {result['mb_per_sec']:8.2f} MB/s"
+        )
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "fixture_sha256": ingest.file_digest(FIXTURE_MANIFEST),
+        "stages": stages,
+    }
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote benchmark report to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#! /usr/bin/env python3
+"""Measure recall and search latency of retrieval configurations.
+
+Queries come from the fixture corpus itself, so their answer is known: every
+TLDR example command and the first SYNOPSIS line of every English man page is
+a query whose ground truth is the command it was taken from. The documents
+are embedded once with the route's embedder and loaded into one collection
+per configuration; each query then goes through ``_encode_query`` and
+``_search_context`` exactly as ``/explain`` does. An exact numpy search over
+the full-size vectors is the baseline every configuration is compared against.
+
+``--dims`` repeats every measurement on Matryoshka-truncated copies of the
+same vectors (first N dimensions, renormalized), which is what ingest and the
+route produce with ``EMBEDDING_DIM=N``.
+
+Quantization and HNSW settings only take effect on a Qdrant server; against
+the default in-memory client all configurations search exactly.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as qmodels
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parents[3]))
+
+from app.api.linuxmancyclopedia import example_route, ingest  # noqa: E402
+from app.api.linuxmancyclopedia.benchmarks import ingest_bench  # noqa: E402
+from app.api.linuxmancyclopedia.embedding import truncate_embeddings  # noqa: E402
+
+CONFIGS: Dict[str, ingest.VectorStorage] = {
+    "float32": ingest.VectorStorage(),
+    "float32-hnsw-m8": ingest.VectorStorage(hnsw_m=8, hnsw_ef_construct=64),
+    "scalar-int8": ingest.VectorStorage(quantization="scalar", quantile=0.99),
+    "scalar-int8-on-disk": ingest.VectorStorage(
+        quantization="scalar", quantile=0.99, on_disk=True
+    ),
+    "product-x16": ingest.VectorStorage(quantization="product", product_compression="x16"),
+    "binary": ingest.VectorStorage(quantization="binary"),
+}
+PLACEHOLDER_RE = re.compile(r"\{\{(.*?)\}\}")
+EXAMPLE_RE = re.compile(r"^\s*Example: (.+)$", re.MULTILINE)
+DEFAULT_HNSW_M = 16
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark retrieval recall and latency.")
+    parser.add_argument("--man-root", type=Path, default=ingest.DEFAULT_MAN_ROOT)
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        choices=sorted(CONFIGS),
+        default=sorted(CONFIGS),
+    )
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--max-queries", type=int, default=300)
+    parser.add_argument(
+        "--dims",
+        type=int,
+        nargs="+",
+        default=[0],
+        help="Truncated vector sizes to compare; 0 is the embedder's full size.",
+    )
+    parser.add_argument("--qdrant-url", type=str, default=None, help="Default: in-memory.")
+    parser.add_argument("--collection-prefix", type=str, default="retrieval_bench")
+    parser.add_argument("--output", type=Path, default=None)
+    return parser.parse_args()
+
+
+def build_queries(
+    man_index: Dict[str, Dict[str, ingest.ManRecord]],
+    tldr_index: Dict[str, List[Dict[str, str]]],
+    max_queries: int,
+) -> List[Dict[str, str]]:
+    """(query, ground-truth command, origin) triples taken from the corpus."""
+    queries: List[Dict[str, str]] = []
+    for command, entries in sorted(tldr_index.items()):
+        for entry in entries:
+            for example in EXAMPLE_RE.findall(entry["content"]):
+                text = PLACEHOLDER_RE.sub(r"\1", example).strip()
+                queries.append({"query": text, "command": command, "origin": "tldr"})
+    for command, records in sorted(man_index.items()):
+        record = records.get("en")
+        synopsis = record.sections.get("SYNOPSIS", "") if record else ""
+        first_line = next((line for line in synopsis.splitlines() if line.strip()), "")
+        if first_line:
+            queries.append({"query": first_line.strip(), "command": command, "origin": "synopsis"})
+    if len(queries) > max_queries:
+        step = len(queries) / max_queries
+        queries = [queries[int(idx * step)] for idx in range(max_queries)]
+    return queries
+
+
+def estimate_memory(storage: ingest.VectorStorage | None, count: int, dim: int) -> Dict[str, int]:
+    """Approximate vector + index bytes in RAM and on disk for ``count`` points."""
+    original = count * dim * 4
+    if storage is None:
+        return {"ram_bytes": original, "disk_bytes": 0}
+    quantized = {
+        "none": 0,
+        "scalar": count * dim,
+        "binary": count * ((dim + 7) // 8),
+        "product": count * dim * 4 // int(storage.product_compression.lstrip("x")),
+    }[storage.quantization or "none"]
+    graph = count * (storage.hnsw_m or DEFAULT_HNSW_M) * 2 * 4
+    ram = graph + (0 if storage.on_disk else original)
+    disk = original if storage.on_disk else 0
+    if storage.always_ram:
+        ram += quantized
+    else:
+        disk += quantized
+    return {"ram_bytes": ram, "disk_bytes": disk}
+
+
+def load_collection(
+    client: QdrantClient,
+    name: str,
+    storage: ingest.VectorStorage,
+    documents: Sequence[ingest.CommandDocument],
+    vectors: np.ndarray,
+) -> None:
+    if ingest.collection_exists(client, name):
+        client.delete_collection(name)
+    ingest.ensure_collection(client, name, vectors.shape[1], storage=storage)
+    # Index right away; the production threshold would leave a small corpus unindexed.
+    client.update_collection(
+        collection_name=name,
+        optimizer_config=qmodels.OptimizersConfigDiff(indexing_threshold=1),
+    )
+    client.upload_collection(
+        collection_name=name,
+        vectors=vectors,
+        payload=[doc.payload() for doc in documents],
+        ids=[doc.point_id() for doc in documents],
+        wait=True,
+    )
+    while client.get_collection(name).status != qmodels.CollectionStatus.GREEN:
+        time.sleep(0.2)
+
+
+def score_rankings(
+    rankings: List[List[str]],
+    queries: List[Dict[str, str]],
+    ks: Sequence[int],
+) -> Dict[str, float]:
+    scores: Dict[str, float] = {}
+    for k in ks:
+        hits = sum(query["command"] in ranking[:k] for ranking, query in zip(rankings, queries))
+        scores[f"recall@{k}"] = round(hits / len(queries), 4)
+    reciprocal = [
+        1.0 / (ranking.index(query["command"]) + 1) if query["command"] in ranking else 0.0
+        for ranking, query in zip(rankings, queries)
+    ]
+    scores["mrr"] = round(float(np.mean(reciprocal)), 4)
+    return scores
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    millis = np.array(seconds) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(millis, 50)), 3),
+        "p95_ms": round(float(np.percentile(millis, 95)), 3),
+        "p99_ms": round(float(np.percentile(millis, 99)), 3),
+    }
+
+
+async def search_all(
+    query_vectors: List[List[float]], limit: int
+) -> tuple[List[List[str]], List[List[str]], List[float]]:
+    """Run every query through the route; return commands, point ids and latencies."""
+    rankings: List[List[str]] = []
+    point_ids: List[List[str]] = []
+    latencies: List[float] = []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        hits = await example_route._search_context(vector, limit=limit)
+        latencies.append(time.perf_counter() - start)
+        rankings.append([(hit.payload or {}).get("command", "") for hit in hits])
+        point_ids.append([str(hit.id) for hit in hits])
+    return rankings, point_ids, latencies
+
+
+def exact_search(
+    matrix: np.ndarray,
+    documents: Sequence[ingest.CommandDocument],
+    query_vectors: List[List[float]],
+    limit: int,
+) -> tuple[List[List[str]], List[List[str]], List[float]]:
+    rankings: List[List[str]] = []
+    point_ids: List[List[str]] = []
+    latencies: List[float] = []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        scores = matrix @ np.asarray(vector, dtype=np.float32)
+        top = np.argpartition(-scores, min(limit, len(scores) - 1))[:limit]
+        top = top[np.argsort(-scores[top])]
+        latencies.append(time.perf_counter() - start)
+        rankings.append([documents[idx].command for idx in top])
+        point_ids.append([documents[idx].point_id() for idx in top])
+    return rankings, point_ids, latencies
+
+
+def overlap(found: List[List[str]], exact: List[List[str]], k: int) -> float:
+    shares = [len(set(a[:k]) & set(b[:k])) / max(1, len(b[:k])) for a, b in zip(found, exact)]
+    return round(float(np.mean(shares)), 4)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, object]:
+    man_root = ingest_bench.materialize_fixture(args.man_root)
+    try:
+        man_index = ingest.parse_man_pages(sorted(ingest.discover_man_files(man_root)), man_root)
+    finally:
+        shutil.rmtree(ingest_bench.SCRATCH_MAN_ROOT.parent, ignore_errors=True)
+    tldr_index = ingest.load_tldr_corpus(ingest_bench.FIXTURE_TLDR_ROOT)
+    build = ingest.DOCUMENT_BUILDERS[example_route.DOCUMENT_SPLIT]
+    documents = build(man_index, tldr_index)
+    queries = build_queries(man_index, tldr_index, args.max_queries)
+    print(f"{len(documents)} documents, {len(queries)} queries.")
+
+    example_route.load_resources()
+    full_matrix = np.asarray(
+        ingest.encode_texts(example_route._EMBEDDER, [doc.text for doc in documents]),
+        dtype=np.float32,
+    )
+    full_queries = np.asarray(
+        [await example_route._encode_query(query["query"]) for query in queries],
+        dtype=np.float32,
+    )
+    full_dim = full_matrix.shape[1]
+    limit = max(args.k)
+    client = (
+        QdrantClient(url=args.qdrant_url, timeout=120)
+        if args.qdrant_url
+        else QdrantClient(":memory:")
+    )
+    example_route._QDRANT_CLIENT = client
+
+    results: Dict[str, Dict[str, object]] = {}
+    reference_ids: List[List[str]] = []
+    for dim in sorted({min(dim or full_dim, full_dim) for dim in args.dims}, reverse=True):
+        suffix = "" if dim == full_dim else f"@{dim}"
+        matrix = truncate_embeddings(full_matrix, dim)
+        query_vectors = truncate_embeddings(full_queries, dim).tolist()
+        exact_rankings, exact_ids, latencies = exact_search(
+            matrix, documents, query_vectors, limit
+        )
+        reference_ids = reference_ids or exact_ids
+        results[f"exact{suffix}"] = {
+            **score_rankings(exact_rankings, queries, args.k),
+            f"exact_overlap@{limit}": overlap(exact_ids, reference_ids, limit),
+            **latency_summary(latencies),
+            **estimate_memory(None, len(documents), dim),
+        }
+        for name in args.configs:
+            collection = f"{args.collection_prefix}_{name.replace('-', '_')}_{dim}"
+            print(f"Loading {name}{suffix} into '{collection}' ...")
+            load_collection(client, collection, CONFIGS[name], documents, matrix)
+            example_route.COLLECTION_NAME = collection
+            rankings, ids, latencies = await search_all(query_vectors, limit)
+            results[f"{name}{suffix}"] = {
+                **score_rankings(rankings, queries, args.k),
+                f"exact_overlap@{limit}": overlap(ids, reference_ids, limit),
+                **latency_summary(latencies),
+                **estimate_memory(CONFIGS[name], len(documents), dim),
+            }
+            if not args.qdrant_url:
+                client.delete_collection(collection)
+    return {
+        "revision": ingest_bench.git_revision(),
+        "model": example_route.EMBEDDING_MODEL_NAME,
+        "split": example_route.DOCUMENT_SPLIT,
+        "qdrant": args.qdrant_url or ":memory:",
+        "documents": len(documents),
+        "queries": len(queries),
+        "dim": int(full_dim),
+        "results": results,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    report = asyncio.run(run(args))
+    for name, result in report["results"].items():
+        recalls = "  ".join(
+            f"{key} {value:.3f}" for key, value in result.items() if key.startswith("recall@")
+        )
+        print(
+            f"{name:>20}: {recalls}  mrr {result['mrr']:.3f}  "
+            f"p50 {result['p50_ms']:7.2f}ms  p99 {result['p99_ms']:7.2f}ms  "
+            f"ram {result['ram_bytes'] / 2**20:7.2f} MiB"
+        )
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote retrieval report to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
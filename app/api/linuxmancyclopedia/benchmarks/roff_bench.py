@@ -0,0 +1,70 @@
+#! /usr/bin/env python3
+"""Compare the single-pass roff renderer with the per-line regex extractor."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+
+from app.api.linuxmancyclopedia import ingest  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark roff section extraction.")
+    parser.add_argument("--man-root", type=Path, default=ingest.DEFAULT_MAN_ROOT)
+    parser.add_argument("--limit", type=int, default=0, help="Only use the first N pages.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per implementation; best is kept.")
+    return parser.parse_args()
+
+
+def load_pages(man_root: Path, limit: int) -> List[str]:
+    paths = sorted(ingest.discover_man_files(man_root))
+    if limit > 0:
+        paths = paths[:limit]
+    return [ingest.read_man_file(path) for path in paths]
+
+
+def best_time(func: Callable[[str], Dict[str, str]], pages: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            func(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    args = parse_args()
+    pages = load_pages(args.man_root, args.limit)
+    line_count = sum(page.count("\n") + 1 for page in pages)
+    megabytes = sum(len(page.encode("utf-8")) for page in pages) / 1e6
+    print(f"Loaded {len(pages)} pages, {line_count} lines, {megabytes:.1f} MB (decompressed).")
+
+    mismatches = sum(
+        ingest.extract_sections(page) != ingest.extract_sections_regex(page) for page in pages
+    )
+    print(f"Pages where the renderers disagree: {mismatches}")
+
+    timings = {}
+    for name, func in (
+        ("regex (per line)", ingest.extract_sections_regex),
+        ("single pass", ingest.extract_sections),
+    ):
+        elapsed = best_time(func, pages, args.repeat)
+        timings[name] = elapsed
+        print(
+            f"{name:>18}: {elapsed:7.3f}s  {line_count / elapsed:12,.0f} lines/s  "
+            f"{megabytes / elapsed:7.1f} MB/s"
+        )
+    speedup = timings["regex (per line)"] / timings["single pass"]
+    print(f"Speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
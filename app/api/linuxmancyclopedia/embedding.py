@@ -0,0 +1,286 @@
+"""Embedding model loading shared by the ingester and the API.
+
+``EMBEDDING_BACKEND`` picks how texts are embedded:
+
+- ``torch`` (default): the SentenceTransformer in fp32 PyTorch.
+- ``onnx``: the same transformer exported to ONNX, dynamically quantized to
+  int8 and run on onnxruntime's CPU provider. The export is built once per
+  model under ``ONNX_MODEL_DIR`` and rejected unless its vectors agree with
+  the fp32 model's (cosine >= ``ONNX_MIN_COSINE``) on a fixed probe set.
+
+``EMBEDDING_DIM`` truncates every vector to its first N dimensions and
+renormalizes it (Matryoshka truncation; 0 keeps the model's full size). The
+ingester and the API must agree on it, so the truncated size is part of the
+model tag recorded with stored vectors.
+
+Both backends expose the subset of the SentenceTransformer API the callers
+use: ``encode``, ``get_sentence_embedding_dimension``, ``tokenizer`` and
+``max_seq_length``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    # Imports torch; loaded with the first model so importing this module stays cheap.
+    from sentence_transformers import SentenceTransformer
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM") or 0)
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR") or Path(__file__).with_name(".onnx_models"))
+ONNX_MIN_COSINE = float(os.getenv("ONNX_MIN_COSINE", "0.98"))
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+ONNX_META_FILE = "embedding.json"
+BACKENDS = ("torch", "onnx")
+# arctic-embed's custom modelling code defaults to xformers attention, which is CUDA-only.
+CPU_CONFIG_KWARGS = {"use_memory_efficient_attention": False, "attn_implementation": "sdpa"}
+PROBE_TEXTS = (
+    "tar -xzf archive.tar.gz",
+    "how do I list hidden files in a directory",
+    "NAME\nchmod - change file mode bits\n\nSYNOPSIS\nchmod [OPTION]... MODE[,MODE]... FILE...",
+    "find . -name '*.log' -mtime +7 -delete",
+    "Copy files and directories. Recursively copy a directory to another location.",
+    "systemctl restart nginx.service",
+    "grep -rn --include='*.py' TODO src/",
+    "Affiche le contenu d'un répertoire, trié par date de modification.",
+)
+
+
+def load_embedder(
+    model_name: str,
+    device: str = "cpu",
+    backend: str | None = None,
+    config_kwargs: Dict[str, object] | None = None,
+    truncate_dim: int | None = None,
+    threads: int | None = None,
+) -> "SentenceTransformer | OnnxEmbedder":
+    """Load ``model_name`` on ``backend``; ``threads`` caps its intra-op CPU threads."""
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected one of {BACKENDS}.")
+    truncate_dim = (EMBEDDING_DIM if truncate_dim is None else truncate_dim) or None
+    if threads and backend == "torch":
+        import torch
+
+        # Process-wide; the default of one thread per core oversubscribes the
+        # CPU as soon as several workers or processes encode at once.
+        torch.set_num_threads(threads)
+    model = _load_backend(model_name, device, backend, config_kwargs, truncate_dim, threads)
+    if truncate_dim and model.get_sentence_embedding_dimension() != truncate_dim:
+        raise ValueError(
+            f"EMBEDDING_DIM={truncate_dim} exceeds the {model_name} embedding size "
+            f"{model.get_sentence_embedding_dimension()}."
+        )
+    return model
+
+
+def _load_backend(
+    model_name: str,
+    device: str,
+    backend: str,
+    config_kwargs: Dict[str, object] | None,
+    truncate_dim: int | None,
+    threads: int | None,
+) -> "SentenceTransformer | OnnxEmbedder":
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        directory = ONNX_MODEL_DIR / re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name)
+        if not (directory / ONNX_META_FILE).exists():
+            reference = SentenceTransformer(
+                model_name,
+                device="cpu",
+                trust_remote_code=True,
+                config_kwargs=config_kwargs or CPU_CONFIG_KWARGS,
+            )
+            export_onnx(reference, model_name, directory)
+        return OnnxEmbedder(directory, truncate_dim=truncate_dim, threads=threads)
+    if config_kwargs is None and device == "cpu":
+        config_kwargs = CPU_CONFIG_KWARGS
+    # SentenceTransformer truncates before normalize_embeddings renormalizes.
+    return SentenceTransformer(
+        model_name,
+        device=device,
+        trust_remote_code=True,
+        config_kwargs=config_kwargs,
+        truncate_dim=truncate_dim,
+    )
+
+
+def model_tag(model_name: str, truncate_dim: int | None = None) -> str:
+    """Name of the vector space a model produces, e.g. ``model@256`` when truncated."""
+    truncate_dim = (EMBEDDING_DIM if truncate_dim is None else truncate_dim) or None
+    return f"{model_name}@{truncate_dim}" if truncate_dim else model_name
+
+
+def backend_tag(
+    model_name: str, backend: str | None = None, truncate_dim: int | None = None
+) -> str:
+    """Identity of the vectors a backend produces, e.g. for cache namespacing."""
+    backend = backend or EMBEDDING_BACKEND
+    tag = model_tag(model_name, truncate_dim)
+    return tag if backend == "torch" else f"{tag}#{backend}-int8"
+
+
+def truncate_embeddings(vectors: np.ndarray, dim: int | None) -> np.ndarray:
+    """Keep the first ``dim`` columns of unit vectors and rescale them to unit length."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if not dim or dim >= vectors.shape[-1]:
+        return vectors
+    truncated = vectors[..., :dim]
+    return truncated / np.maximum(np.linalg.norm(truncated, axis=-1, keepdims=True), 1e-12)
+
+
+def export_onnx(model: SentenceTransformer, model_name: str, directory: Path) -> Dict[str, object]:
+    """Export ``model`` to int8 ONNX in ``directory`` and check it against fp32."""
+    import torch
+
+    _require_onnxruntime()
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    transformer, pooling = model[0], model[1]
+    pooling_mode = pooling.get_pooling_mode_str()
+    if pooling_mode not in ("cls", "mean"):
+        raise ValueError(f"ONNX backend supports cls/mean pooling, not {pooling_mode!r}.")
+    directory.mkdir(parents=True, exist_ok=True)
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(list(PROBE_TEXTS[:2]), padding=True, return_tensors="pt")
+    input_names = [
+        name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample
+    ]
+
+    class _HiddenStates(torch.nn.Module):
+        def __init__(self, auto_model: torch.nn.Module):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs: torch.Tensor) -> torch.Tensor:
+            return self.auto_model(**dict(zip(input_names, inputs)), return_dict=True)[0]
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["hidden"]}
+    with torch.no_grad():
+        torch.onnx.export(
+            _HiddenStates(transformer.auto_model.eval()),
+            tuple(sample[name] for name in input_names),
+            str(directory / ONNX_FP32_FILE),
+            input_names=input_names,
+            output_names=["hidden"],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            dynamo=False,
+        )
+    quantize_dynamic(
+        str(directory / ONNX_FP32_FILE),
+        str(directory / ONNX_INT8_FILE),
+        weight_type=QuantType.QInt8,
+    )
+    (directory / ONNX_FP32_FILE).unlink()
+    tokenizer.save_pretrained(str(directory))
+    meta: Dict[str, object] = {
+        "model": model_name,
+        "pooling": pooling_mode,
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        "dim": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "inputs": input_names,
+    }
+    (directory / ONNX_META_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    expected = model.encode(list(PROBE_TEXTS), normalize_embeddings=True)
+    actual = OnnxEmbedder(directory).encode(list(PROBE_TEXTS), normalize_embeddings=True)
+    cosines = np.sum(expected * actual, axis=1)
+    meta["min_cosine"] = round(float(cosines.min()), 6)
+    meta["mean_cosine"] = round(float(cosines.mean()), 6)
+    if meta["min_cosine"] < ONNX_MIN_COSINE:
+        (directory / ONNX_META_FILE).unlink()
+        raise RuntimeError(
+            f"int8 ONNX export of {model_name} agrees with fp32 only down to cosine "
+            f"{meta['min_cosine']:.4f} (< {ONNX_MIN_COSINE}); use the torch backend instead."
+        )
+    (directory / ONNX_META_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    print(
+        f"Exported {model_name} to int8 ONNX in {directory} "
+        f"(cosine vs fp32: min {meta['min_cosine']:.4f}, mean {meta['mean_cosine']:.4f})."
+    )
+    return meta
+
+
+def _require_onnxruntime() -> None:
+    try:
+        import onnx  # noqa: F401
+        import onnxruntime  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError(
+            "EMBEDDING_BACKEND=onnx needs the onnxruntime and onnx packages: "
+            "pip install -r requirements-onnx.txt"
+        ) from exc
+
+
+class OnnxEmbedder:
+    """int8 ONNX encoder with SentenceTransformer-style ``encode``."""
+
+    def __init__(
+        self, directory: Path, truncate_dim: int | None = None, threads: int | None = None
+    ):
+        _require_onnxruntime()
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        meta = json.loads((directory / ONNX_META_FILE).read_text(encoding="utf-8"))
+        self.model_name = meta["model"]
+        self.pooling = meta["pooling"]
+        self.normalize = meta["normalize"]
+        self.dim = min(truncate_dim or meta["dim"], meta["dim"])
+        self.max_seq_length = meta["max_seq_length"]
+        self.input_names: List[str] = meta["inputs"]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(directory))
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(directory / ONNX_INT8_FILE), options, providers=["CPUExecutionProvider"]
+        )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        show_progress_bar: bool = False,
+        **_: object,
+    ) -> np.ndarray:
+        texts = [sentences] if isinstance(sentences, str) else list(sentences)
+        output = np.zeros((len(texts), self.dim), dtype=np.float32)
+        # Sort by length so each batch pads to similar sizes, as SentenceTransformer does.
+        order = sorted(range(len(texts)), key=lambda idx: -len(texts[idx]))
+        for start in range(0, len(order), max(1, batch_size)):
+            rows = order[start : start + batch_size]
+            encoded = self.tokenizer(
+                [texts[row] for row in rows],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            if self.pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = feeds["attention_mask"][..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            output[rows] = pooled[:, : self.dim]
+        if self.normalize or normalize_embeddings:
+            output /= np.maximum(np.linalg.norm(output, axis=1, keepdims=True), 1e-12)
+        return output
@@ -3,19 +3,38 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import json
 import os
+import re
+import shlex
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import AsyncGenerator, Iterable, List
+from typing import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    TypeVar,
+)
 
 import httpx
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, FastAPI, HTTPException, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qmodels
-from sentence_transformers import SentenceTransformer
 
+from app.api.linuxmancyclopedia.embedding import load_embedder, model_tag
+from app.api.linuxmancyclopedia.vector_store import VectorStore, document_point_id
 from app.safety import get_danger_warning, is_dangerous
 
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
@@ -33,48 +52,678 @@ QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "60"))
-
-_EMBEDDER = SentenceTransformer(
-    EMBEDDING_MODEL_NAME, device=EMBEDDING_DEVICE, trust_remote_code=True
+DOCUMENT_SPLIT = os.getenv("QDRANT_DOCUMENT_SPLIT", "command")
+# "qdrant" searches the Qdrant service; "local" searches an ingest --export-vectors
+# directory in-process and needs no Qdrant at all.
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "qdrant")
+VECTOR_STORE_DIR = Path(
+    os.getenv("VECTOR_STORE_DIR") or Path(__file__).with_name(".vector_store")
 )
-_QDRANT_CLIENT = (
-    QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY, timeout=QDRANT_TIMEOUT)
-    if QDRANT_URL
-    else QdrantClient(
-        host=QDRANT_HOST, port=QDRANT_PORT, api_key=QDRANT_API_KEY, timeout=QDRANT_TIMEOUT
-    )
+FALLBACK_LANGUAGE = "en"
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CHUNK_SEARCH_LIMIT = int(os.getenv("CHUNK_SEARCH_LIMIT", "24"))
+SECTION_ORDER = ("NAME", "SYNOPSIS", "DESCRIPTION", "OPTIONS", "TLDR")
+# Only take effect on quantized collections: fetch limit * oversampling candidates
+# by quantized score, then rescore them with the original vectors.
+SEARCH_PARAMS = qmodels.SearchParams(
+    hnsw_ef=int(os.getenv("QDRANT_SEARCH_HNSW_EF")) if os.getenv("QDRANT_SEARCH_HNSW_EF") else None,
+    quantization=qmodels.QuantizationSearchParams(
+        rescore=os.getenv("QDRANT_RESCORE", "true").lower() in {"1", "true", "yes"},
+        oversampling=float(os.getenv("QDRANT_OVERSAMPLING", "2.0")),
+    ),
 )
+# Commands named in the request are fetched by point id; embedding + search only
+# runs when one of them is unknown, there are too many, or related=true.
+MAX_EXACT_COMMANDS = 5
+EXACT_SCROLL_PAGE = 256
+# Commands that run another command, with their options that take a separate argument.
+COMMAND_WRAPPERS: Dict[str, frozenset[str]] = {
+    "sudo": frozenset(
+        {
+            "-C", "-D", "-R", "-T", "-U", "-g", "-h", "-p", "-r", "-t", "-u",
+            "--chdir", "--chroot", "--close-from", "--command-timeout", "--group",
+            "--host", "--other-user", "--prompt", "--role", "--type", "--user",
+        }
+    ),
+    "doas": frozenset({"-C", "-u"}),
+    "env": frozenset({"-C", "-S", "-u", "--chdir", "--split-string", "--unset"}),
+    "nohup": frozenset(),
+    "time": frozenset({"-f", "-o", "--format", "--output"}),
+    "nice": frozenset({"-n", "--adjustment"}),
+    "exec": frozenset({"-a"}),
+    "command": frozenset(),
+}
+ASSIGNMENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+
+# Load and warm the embedder when the app starts. Workers that serve no /explain
+# traffic can turn this off; they then load on the first request instead.
+EXPLAIN_WARMUP = os.getenv("EXPLAIN_WARMUP", "true").lower() in {"1", "true", "yes"}
+WARMUP_QUERIES = ("ls -la", "tar -xzf archive.tar.gz", "find . -name '*.log' -mtime +7 -delete")
+# A failed warmup (Qdrant down, model download interrupted) is retried with
+# exponential backoff until it succeeds.
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "1"))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "60"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+QUERY_BATCH_SIZE = int(os.getenv("QUERY_BATCH_SIZE", "16"))
+QUERY_BATCH_WAIT_MS = float(os.getenv("QUERY_BATCH_WAIT_MS", "5"))
+# CPU-bound encodes and I/O-bound Qdrant calls get separate pools, so a saturated
+# embedder cannot starve Qdrant lookups or the default executor other routes use.
+EMBED_EXECUTOR_WORKERS = int(os.getenv("EMBED_EXECUTOR_WORKERS", "1"))
+QDRANT_EXECUTOR_WORKERS = int(os.getenv("QDRANT_EXECUTOR_WORKERS", "8"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0")) or None
+
+T = TypeVar("T")
+
+# Created by load_backend() / load_model(), not at import: importing the router
+# stays cheap, and exact-name lookups never wait for the model.
+_EMBEDDER = None
+_VECTOR_STORE: VectorStore | None = None
+_QDRANT_CLIENT: QdrantClient | None = None
+_BACKEND_LOADED = False
+_BACKEND_LOCK = threading.Lock()
+_MODEL_LOCK = threading.Lock()
+_READINESS: Dict[str, object] = {"status": "cold"}
+_WARMUP_TASK: asyncio.Task | None = None  # referenced so it is not garbage collected
 
 router = APIRouter(prefix="/api/v1", tags=["linux explained"])
 
 
+class InstrumentedExecutor:
+    """Bounded thread pool that records how long calls queue for a free thread."""
+
+    def __init__(self, name: str, workers: int, window: int = 2048):
+        self.name = name
+        self.workers = max(1, workers)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+        self.waits: Deque[float] = deque(maxlen=window)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+
+    async def run(self, func: Callable[..., T], *args: object) -> T:
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        def call() -> T:
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.waits.append(time.perf_counter() - submitted)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        return await asyncio.get_running_loop().run_in_executor(self.pool, call)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            waits = sorted(self.waits)
+            record: Dict[str, object] = {
+                "workers": self.workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+            }
+        if waits:
+            record["queue_wait_ms"] = {
+                "p50": round(waits[len(waits) // 2] * 1000, 3),
+                "p95": round(waits[int(len(waits) * 0.95)] * 1000, 3),
+                "max": round(waits[-1] * 1000, 3),
+            }
+        return record
+
+
+_EMBED_EXECUTOR = InstrumentedExecutor("explain-embed", EMBED_EXECUTOR_WORKERS)
+_QDRANT_EXECUTOR = InstrumentedExecutor("explain-qdrant", QDRANT_EXECUTOR_WORKERS)
+
+
+class QueryEmbeddingCache:
+    """LRU cache of query vectors whose entries expire after ``ttl`` seconds.
+
+    Concurrent misses on one key share a single computation, which keeps
+    running even if the caller that started it is cancelled. Only touched from
+    the event loop, so it needs no lock.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, List[float]]] = OrderedDict()
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get(self, key: str, compute: Callable[[], Awaitable[List[float]]]) -> List[float]:
+        if self.max_size <= 0:
+            return await compute()
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self.entries[key]
+        task = self.pending.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(compute())
+            self.pending[key] = task
+            task.add_done_callback(functools.partial(self._settle, key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _settle(self, key: str, task: asyncio.Future) -> None:
+        del self.pending[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, task.result())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class QueryBatcher:
+    """Merges concurrent query encodes into one batched ``encode`` call.
+
+    A query waits at most ``max_wait`` seconds for others to join it, and a
+    batch leaves as soon as it holds ``max_batch`` queries. Batches run one at
+    a time; queries arriving meanwhile form the next batch and are dispatched
+    as soon as the model is free, since they have already waited.
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], List[List[float]]],
+        max_batch: int,
+        max_wait: float,
+        executor: InstrumentedExecutor,
+    ):
+        self.encode_batch = encode_batch
+        self.executor = executor
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.queue: Deque[tuple[str, asyncio.Future, float]] = deque()
+        self.batches = 0
+        self.queries = 0
+        self._wakeup: asyncio.Event | None = None
+        self._full: asyncio.Event | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def encode(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._wakeup, self._full = asyncio.Event(), asyncio.Event()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self.queue.append((text, future, loop.time()))
+        self._wakeup.set()
+        if len(self.queue) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            remaining = self.queue[0][2] + self.max_wait - loop.time()
+            if len(self.queue) < self.max_batch and remaining > 0:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            batch = []
+            while self.queue and len(batch) < self.max_batch:
+                text, future, _ = self.queue.popleft()
+                if not future.done():
+                    batch.append((text, future))
+            if not batch:
+                continue
+            try:
+                vectors = await self.executor.run(
+                    self.encode_batch, [text for text, _ in batch]
+                )
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            except BaseException:
+                # The worker itself is being cancelled: release its callers.
+                for _, future in batch:
+                    future.cancel()
+                raise
+            self.batches += 1
+            self.queries += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "queue_depth": len(self.queue),
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+def _encode_batch(texts: List[str]) -> List[List[float]]:
+    return _EMBEDDER.encode(
+        texts, batch_size=len(texts), normalize_embeddings=True, show_progress_bar=False
+    ).tolist()
+
+
+_QUERY_CACHE = QueryEmbeddingCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+_QUERY_BATCHER = QueryBatcher(
+    _encode_batch, QUERY_BATCH_SIZE, QUERY_BATCH_WAIT_MS / 1000, _EMBED_EXECUTOR
+)
+
+
+def load_backend() -> None:
+    """Create the Qdrant client or open the local vector store, once per process."""
+    global _VECTOR_STORE, _QDRANT_CLIENT, _BACKEND_LOADED
+    with _BACKEND_LOCK:
+        if _BACKEND_LOADED:
+            return
+        if RETRIEVAL_BACKEND == "local":
+            store = VectorStore(VECTOR_STORE_DIR)
+            if store.model != model_tag(EMBEDDING_MODEL_NAME):
+                raise RuntimeError(
+                    f"Vector store {VECTOR_STORE_DIR} was built with {store.model}, "
+                    f"not {model_tag(EMBEDDING_MODEL_NAME)}."
+                )
+            _VECTOR_STORE = store
+        elif QDRANT_URL:
+            _QDRANT_CLIENT = QdrantClient(
+                url=QDRANT_URL, api_key=QDRANT_API_KEY, timeout=QDRANT_TIMEOUT
+            )
+        else:
+            _QDRANT_CLIENT = QdrantClient(
+                host=QDRANT_HOST, port=QDRANT_PORT, api_key=QDRANT_API_KEY, timeout=QDRANT_TIMEOUT
+            )
+        _BACKEND_LOADED = True
+
+
+def load_model() -> None:
+    """Load the query embedder once per process."""
+    global _EMBEDDER
+    with _MODEL_LOCK:
+        if _EMBEDDER is None:
+            _EMBEDDER = load_embedder(
+                EMBEDDING_MODEL_NAME, device=EMBEDDING_DEVICE, threads=EMBEDDING_THREADS
+            )
+
+
+def load_resources() -> None:
+    """Create the vector backend and the embedder."""
+    load_backend()
+    load_model()
+
+
+def warmup() -> bool:
+    """Load resources, then run the first encodes and a search off the request path.
+
+    The first forward passes of a freshly loaded model are several times slower
+    than later ones; a failed search also surfaces a missing collection or a
+    vector size mismatch here rather than on the first request.
+    """
+    if _READINESS["status"] != "ready":
+        _READINESS.update(status="loading", error=None)
+    start = time.perf_counter()
+    try:
+        load_resources()
+        for query in WARMUP_QUERIES:
+            vector = _EMBEDDER.encode(
+                [query], normalize_embeddings=True, show_progress_bar=False
+            )[0]
+        if _VECTOR_STORE is not None:
+            _VECTOR_STORE.search(vector, limit=1)
+        else:
+            _QDRANT_CLIENT.search(
+                collection_name=COLLECTION_NAME,
+                query_vector=vector.tolist(),
+                search_params=SEARCH_PARAMS,
+                limit=1,
+            )
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        if _READINESS["status"] != "ready":
+            _READINESS.update(status="failed", error=error)
+        print(f"Explain warmup failed: {error}")
+        return False
+    _READINESS.update(
+        status="ready", error=None, warmup_seconds=round(time.perf_counter() - start, 3)
+    )
+    return True
+
+
+async def _warmup_with_retries() -> None:
+    delay = WARMUP_RETRY_SECONDS
+    while not await _EMBED_EXECUTOR.run(warmup):
+        _READINESS["retry_seconds"] = delay
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+    _READINESS.pop("retry_seconds", None)
+
+
+async def _ensure_backend() -> None:
+    if not _BACKEND_LOADED:
+        await _QDRANT_EXECUTOR.run(load_backend)
+
+
+async def _ensure_model() -> None:
+    if _EMBEDDER is None or not _BACKEND_LOADED:
+        await _EMBED_EXECUTOR.run(load_resources)
+        if _READINESS["status"] != "ready":
+            # Loading on a request worked, whether warmup is off or has not
+            # succeeded yet.
+            _READINESS.update(status="ready", error=None)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Warm up in the background so startup does not wait for the model."""
+    global _WARMUP_TASK
+    if EXPLAIN_WARMUP:
+        _WARMUP_TASK = asyncio.create_task(_warmup_with_retries())
+    try:
+        yield
+    finally:
+        if _WARMUP_TASK is not None:
+            _WARMUP_TASK.cancel()
+        if _QDRANT_CLIENT is not None:
+            _QDRANT_CLIENT.close()
+
+
 class ExplainCommandRequest(BaseModel):
     command: str = Field(..., min_length=1, max_length=2000)
+    language: str = Field(FALLBACK_LANGUAGE, min_length=2, max_length=16)
+    related: bool = Field(
+        False, description="Search for related commands instead of only the ones named."
+    )
 
 
 async def _encode_query(text: str) -> List[float]:
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(
-        None,
-        lambda: _EMBEDDER.encode(
-            [text], normalize_embeddings=True, show_progress_bar=False
-        )[0].tolist(),
-    )
+    # Whitespace differences don't change what is asked; case and quoting do.
+    query = " ".join(text.split())
+    return await _QUERY_CACHE.get(query, lambda: _embed_query(query))
+
+
+async def _embed_query(text: str) -> List[float]:
+    await _ensure_model()
+    return await _QUERY_BATCHER.encode(text)
 
 
-async def _search_context(vector: List[float], limit: int) -> List[qmodels.ScoredPoint]:
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(
-        None,
+async def _search_context(
+    vector: List[float], limit: int, languages: List[str] | None = None
+) -> List[qmodels.ScoredPoint]:
+    await _ensure_backend()
+    if _VECTOR_STORE is not None:
+        store = _VECTOR_STORE
+
+        def search() -> List[qmodels.ScoredPoint]:
+            # A full scan of the matrix, plus page faults on a cold mapping,
+            # would stall every other request on the event loop.
+            return [
+                qmodels.ScoredPoint(
+                    id=store.ids[row], version=0, score=score, payload=store.payload(row)
+                )
+                for row, score in store.search(vector, limit, languages)
+            ]
+
+        return await _QDRANT_EXECUTOR.run(search)
+    query_filter = (
+        qmodels.Filter(
+            must=[qmodels.FieldCondition(key="language", match=qmodels.MatchAny(any=languages))]
+        )
+        if languages
+        else None
+    )
+    return await _QDRANT_EXECUTOR.run(
         lambda: _QDRANT_CLIENT.search(
             collection_name=COLLECTION_NAME,
             query_vector=vector,
+            query_filter=query_filter,
+            search_params=SEARCH_PARAMS,
             limit=limit,
             with_payload=True,
         ),
     )
 
 
+def _base_commands(command: str) -> List[str]:
+    """Programs a shell line runs, e.g. ``["tar"]`` for ``tar -xzf foo.tgz``.
+
+    Every simple command of a pipeline or list contributes its first word, past
+    ``VAR=value`` assignments and wrappers such as ``sudo`` (which count too),
+    along with the wrapper's options and their arguments (``sudo -u root ls``).
+    """
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        tokens = list(lexer)
+    except ValueError:  # unbalanced quotes
+        return []
+    commands: List[str] = []
+    expect, wrapper, option_argument = True, None, False
+    for token in tokens:
+        if not token.strip("|&;()<>"):
+            # Control operators start a new command; redirections do not.
+            if not token.strip("|&;()"):
+                expect, wrapper, option_argument = True, None, False
+            continue
+        if option_argument:
+            option_argument = False
+            continue
+        if wrapper is not None and token.startswith("-"):
+            option_argument = token in COMMAND_WRAPPERS[wrapper]
+            continue
+        if not expect or ASSIGNMENT_RE.match(token):
+            continue
+        # Ingest keys documents by lower-cased page names.
+        name = token.rsplit("/", 1)[-1].lower()
+        if name and name not in commands:
+            commands.append(name)
+        wrapper = name if name in COMMAND_WRAPPERS else None
+        expect = wrapper is not None
+    return commands
+
+
+def _exact_point_ids(commands: List[str], languages: List[str]) -> List[str]:
+    if DOCUMENT_SPLIT == "command":
+        return [document_point_id(command) for command in commands]
+    return [document_point_id(command, lang) for command in commands for lang in languages]
+
+
+async def _fetch_points(point_ids: List[str]) -> List[qmodels.ScoredPoint]:
+    """The existing points among ``point_ids``, in that order, scored as exact matches."""
+    if _VECTOR_STORE is not None:
+        rows = [_VECTOR_STORE.rows.get(point_id) for point_id in point_ids]
+        return [
+            qmodels.ScoredPoint(
+                id=point_id, version=0, score=1.0, payload=_VECTOR_STORE.payload(row)
+            )
+            for point_id, row in zip(point_ids, rows)
+            if row is not None
+        ]
+    records = await _QDRANT_EXECUTOR.run(
+        lambda: _QDRANT_CLIENT.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=point_ids,
+            with_payload=True,
+            with_vectors=False,
+        ),
+    )
+    order = {point_id: idx for idx, point_id in enumerate(point_ids)}
+    records.sort(key=lambda record: order.get(str(record.id), len(order)))
+    return [
+        qmodels.ScoredPoint(id=record.id, version=0, score=1.0, payload=record.payload)
+        for record in records
+    ]
+
+
+async def _resolve_aliases(names: List[str]) -> Dict[str, str]:
+    """Map each of ``names`` that another command's page documents to that command."""
+    if _VECTOR_STORE is not None:
+        # Exports have no payload index to look aliases up by; they go through search.
+        return {}
+
+    def lookup() -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        for name in names:
+            records, _ = _QDRANT_CLIENT.scroll(
+                collection_name=COLLECTION_NAME,
+                scroll_filter=qmodels.Filter(
+                    must=[
+                        qmodels.FieldCondition(
+                            key="aliases", match=qmodels.MatchValue(value=name)
+                        )
+                    ]
+                ),
+                limit=1,
+                with_payload=["command"],
+                with_vectors=False,
+            )
+            if records:
+                found[name] = (records[0].payload or {}).get("command", "")
+        return found
+
+    return await _QDRANT_EXECUTOR.run(lookup)
+
+
+async def _fetch_sections(
+    commands: List[str], languages: List[str]
+) -> List[qmodels.ScoredPoint]:
+    """Every section chunk of ``commands`` in ``languages``, in man-page order."""
+    if _VECTOR_STORE is not None:
+        # Chunks are numbered from 0 without gaps: probe ids until one is missing.
+        point_ids: List[str] = []
+        for command in commands:
+            for lang in languages:
+                for section in SECTION_ORDER:
+                    chunk = 0
+                    while (
+                        point_id := document_point_id(command, lang, section, chunk)
+                    ) in _VECTOR_STORE.rows:
+                        point_ids.append(point_id)
+                        chunk += 1
+        return await _fetch_points(point_ids)
+
+    def scroll() -> List[qmodels.Record]:
+        must = [qmodels.FieldCondition(key="command", match=qmodels.MatchAny(any=commands))]
+        if languages:
+            must.append(
+                qmodels.FieldCondition(key="language", match=qmodels.MatchAny(any=languages))
+            )
+        records: List[qmodels.Record] = []
+        offset = None
+        while True:
+            page, offset = _QDRANT_CLIENT.scroll(
+                collection_name=COLLECTION_NAME,
+                scroll_filter=qmodels.Filter(must=must),
+                limit=EXACT_SCROLL_PAGE,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
+            )
+            records.extend(page)
+            if offset is None:
+                return records
+
+    records = await _QDRANT_EXECUTOR.run(scroll)
+    points = [
+        qmodels.ScoredPoint(id=record.id, version=0, score=1.0, payload=record.payload)
+        for record in records
+    ]
+    command_rank = {command: idx for idx, command in enumerate(commands)}
+    language_rank = {lang: idx for idx, lang in enumerate(languages)}
+    points.sort(
+        key=lambda point: (
+            command_rank.get((point.payload or {}).get("command"), len(command_rank)),
+            language_rank.get((point.payload or {}).get("language"), len(language_rank)),
+            *_chunk_position(point),
+        )
+    )
+    return points
+
+
+async def _fetch_commands(
+    commands: List[str], languages: List[str]
+) -> List[qmodels.ScoredPoint]:
+    if DOCUMENT_SPLIT == "section":
+        return await _fetch_sections(commands, languages)
+    return await _fetch_points(_exact_point_ids(commands, languages))
+
+
+async def _lookup_commands(
+    commands: List[str], languages: List[str]
+) -> List[qmodels.ScoredPoint] | None:
+    """Stored documents of exactly ``commands``, or None unless every one is known."""
+    if not commands or len(commands) > MAX_EXACT_COMMANDS:
+        return None
+    await _ensure_backend()
+    points = await _fetch_commands(commands, languages)
+    found = {(point.payload or {}).get("command") for point in points}
+    missing = [command for command in commands if command not in found]
+    if missing:
+        aliases = await _resolve_aliases(missing)
+        if len(aliases) < len(missing):
+            return None
+        canonical = [command for command in dict.fromkeys(aliases.values()) if command not in found]
+        points += await _fetch_commands(canonical, languages)
+        found |= {(point.payload or {}).get("command") for point in points}
+        if any(command not in found for command in canonical):
+            return None
+    return points
+
+
+def _prefer_language(
+    points: Iterable[qmodels.ScoredPoint], language: str, limit: int
+) -> List[qmodels.ScoredPoint]:
+    """Keep one hit per command, taking the requested language over the fallback."""
+    chosen: dict[str, qmodels.ScoredPoint] = {}
+    for point in points:
+        payload = point.payload or {}
+        command = payload.get("command", "")
+        current = chosen.get(command)
+        if current is None or (
+            payload.get("language") == language
+            and (current.payload or {}).get("language") != language
+        ):
+            chosen[command] = point
+    ranked = sorted(chosen.values(), key=lambda point: point.score, reverse=True)
+    return ranked[:limit]
+
+
 def _merge_context(points: Iterable[qmodels.ScoredPoint]) -> str:
     blocks: List[str] = []
     for point in points:
@@ -88,6 +737,57 @@ def _merge_context(points: Iterable[qmodels.ScoredPoint]) -> str:
     return "\n\n".join(blocks) if blocks else "Context unavailable."
 
 
+def _estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English man-page prose.
+    return len(text) // 4 + 1
+
+
+def _chunk_position(point: qmodels.ScoredPoint) -> tuple[int, int]:
+    payload = point.payload or {}
+    section = payload.get("section")
+    rank = SECTION_ORDER.index(section) if section in SECTION_ORDER else len(SECTION_ORDER)
+    return rank, payload.get("chunk") or 0
+
+
+def _assemble_chunks(
+    points: Iterable[qmodels.ScoredPoint], language: str, token_budget: int
+) -> str:
+    """Build context from the best section chunks, grouped by command.
+
+    Chunks are admitted in score order until ``token_budget`` is spent. A
+    command's fallback-language chunks are dropped when it also matched in the
+    requested language. Within a command, chunks are printed in man-page order.
+    """
+    ranked = sorted(points, key=lambda point: point.score, reverse=True)
+    requested = {
+        (point.payload or {}).get("command")
+        for point in ranked
+        if (point.payload or {}).get("language") == language
+    }
+    selected: dict[str, List[qmodels.ScoredPoint]] = {}
+    used = 0
+    for point in ranked:
+        payload = point.payload or {}
+        command = payload.get("command", "unknown")
+        if command in requested and payload.get("language") != language:
+            continue
+        cost = _estimate_tokens(payload.get("document", ""))
+        if used + cost > token_budget:
+            continue
+        used += cost
+        selected.setdefault(command, []).append(point)
+    blocks: List[str] = []
+    for command, chunks in selected.items():
+        chunks.sort(key=_chunk_position)
+        languages = sorted({(point.payload or {}).get("language", "n/a") for point in chunks})
+        best = max(point.score for point in chunks)
+        body = "\n\n".join((point.payload or {}).get("document", "") for point in chunks)
+        blocks.append(
+            f"Command: {command} | Languages: {', '.join(languages)}\nScore: {best:.4f}\n{body}"
+        )
+    return "\n\n".join(blocks) if blocks else "Context unavailable."
+
+
 def _build_user_message(command: str, context_blob: str, warning: str | None) -> str:
     parts = []
     if warning:
@@ -165,6 +865,26 @@ async def _openrouter_stream(payload: dict) -> AsyncGenerator[str, None]:
                     yield delta
 
 
+@router.get("/ready", summary="Whether the explain embedder and vector backend are warm")
+async def readiness() -> JSONResponse:
+    ready = _READINESS["status"] == "ready"
+    return JSONResponse(
+        _READINESS, status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+@router.get("/stats", summary="Explain caches and queues")
+async def explain_stats() -> Dict[str, object]:
+    return {
+        "query_cache": _QUERY_CACHE.stats(),
+        "query_batcher": _QUERY_BATCHER.stats(),
+        "executors": {
+            "embed": _EMBED_EXECUTOR.stats(),
+            "qdrant": _QDRANT_EXECUTOR.stats(),
+        },
+    }
+
+
 @router.post(
     "/explain",
     response_class=StreamingResponse,
@@ -178,9 +898,22 @@ async def explain_command(request: ExplainCommandRequest) -> StreamingResponse:
         )
 
     warning = get_danger_warning() if is_dangerous(command) else None
-    vector = await _encode_query(command)
-    hits = await _search_context(vector, limit=5)
-    context_blob = _merge_context(hits)
+    language = request.language.strip() or FALLBACK_LANGUAGE
+    languages = sorted({language, FALLBACK_LANGUAGE})
+    exact = None if request.related else await _lookup_commands(_base_commands(command), languages)
+    if DOCUMENT_SPLIT == "section":
+        hits = exact or await _search_context(
+            await _encode_query(command), limit=CHUNK_SEARCH_LIMIT, languages=languages
+        )
+        context_blob = _assemble_chunks(hits, language, CONTEXT_TOKEN_BUDGET)
+    elif DOCUMENT_SPLIT == "language":
+        hits = exact or await _search_context(
+            await _encode_query(command), limit=5 * len(languages), languages=languages
+        )
+        context_blob = _merge_context(_prefer_language(hits, language, limit=5))
+    else:
+        hits = exact or await _search_context(await _encode_query(command), limit=5)
+        context_blob = _merge_context(hits)
     payload = _build_openrouter_payload(command, context_blob, warning)
 
     async def event_stream() -> AsyncGenerator[str, None]:
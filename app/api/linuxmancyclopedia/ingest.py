@@ -1,28 +1,70 @@
 #! /usr/bin/env python3
-"""Ingest Debian/Ubuntu man pages and TLDR snippets into Qdrant."""
+"""Ingest Debian/Ubuntu man pages and TLDR snippets into Qdrant.
+
+Run from the repository root: ``python -m app.api.linuxmancyclopedia.ingest``.
+"""
 
 from __future__ import annotations
 
 import argparse
+import datetime
+import functools
 import gzip
+import hashlib
+import json
 import os
+import posixpath
+import tarfile
+import threading
+import time
+import tracemalloc
 import unicodedata
-import uuid
-from collections import defaultdict
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from dotenv import load_dotenv
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Dict, Iterator, List
+from dataclasses import dataclass, field
+from pathlib import Path, PurePath, PurePosixPath
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    TypeVar,
+)
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+import grpc
+import httpx
+import numpy as np
 import re
 from qdrant_client import QdrantClient
 from qdrant_client.http import exceptions as qdrant_exceptions
 from qdrant_client.http import models as qmodels
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+from app.api.linuxmancyclopedia.embedding import (
+    BACKENDS,
+    EMBEDDING_BACKEND,
+    EMBEDDING_DIM,
+    backend_tag,
+    load_embedder,
+    model_tag,
+)
+from app.api.linuxmancyclopedia.vector_store import document_point_id, write_store
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 MODEL_NAME = "Snowflake/snowflake-arctic-embed-m-v2.0"
-UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "linux-explained/vector-docs")
 
 REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
 DEFAULT_MAN_ROOT = (
@@ -37,7 +79,21 @@ DEFAULT_MAN_ROOT = (
     / "share"
     / "man"
 )
+DEFAULT_DEB_ROOT = DEFAULT_MAN_ROOT.parents[3]
 DEFAULT_TLDR_ROOT = REPO_ROOT / "data" / "tldr"
+DEB_MAN_PREFIX = PurePosixPath("usr/share/man")
+AR_MAGIC = b"!<arch>\n"
+SO_STUB_MAX_BYTES = 512
+DEFAULT_MANIFEST_PATH = (
+    REPO_ROOT / "app" / "api" / "linuxmancyclopedia" / ".ingest_manifest.json"
+)
+MANIFEST_VERSION = 2
+DEFAULT_EMBEDDING_CACHE_DIR = (
+    REPO_ROOT / "app" / "api" / "linuxmancyclopedia" / ".embedding_cache"
+)
+DEFAULT_SNAPSHOT_DIR = REPO_ROOT / "app" / "api" / "linuxmancyclopedia" / "snapshots"
+DEFAULT_VECTOR_STORE_DIR = REPO_ROOT / "app" / "api" / "linuxmancyclopedia" / ".vector_store"
+DEFAULT_REPORT_PATH = REPO_ROOT / "app" / "api" / "linuxmancyclopedia" / ".ingest_report.json"
 
 SECTION_ALIASES: Dict[str, set[str]] = {
     "NAME": {
@@ -77,7 +133,26 @@ SECTION_ALIASES: Dict[str, set[str]] = {
 
 SECTION_RE = re.compile(r"^\.(?:SH|Ss)\s+\"?([^\"\n]+)\"?.*$", re.IGNORECASE)
 FORMATTING_MACRO_RE = re.compile(r"^\.(?:[A-Z]{1,2})(?:\s+.*)?$")
+# Font (\fB), size (\s-1) escapes and the backslash of \- in a single pass.
+ROFF_ESCAPE_RE = re.compile(r"\\(?:f[PRBI]|s-?\d+)|\\(?=-)")
+# Both match from the newline that starts the line, so the scan can jump
+# between literal "\n." prefixes instead of trying every position.
+HEADER_LINE_RE = re.compile(r"\n\.(?i:sh|ss)[^\S\n][^\n]*")
+MACRO_LINE_RE = re.compile(r"\n\.[^\n]*")
+# Line boundaries other than "\n" that str.splitlines() also honours.
+LINE_BREAKS = ("\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
+DROPPED_MACROS = frozenset({"BR", "PP", "P", "LP", "HP", "IP", "TP"})
 MAN_SECTION_SUFFIXES = {f".{idx}" for idx in range(1, 10)}
+CHUNK_SECTIONS = ("NAME", "SYNOPSIS", "DESCRIPTION", "OPTIONS")
+DEFAULT_CHUNK_CHARS = 1500
+# Documents length-bucketed together; upserts still follow input order.
+BUCKET_WINDOW = 1024
+BULK_UPLOAD_BATCH = 256
+FLAG_LINE_RE = re.compile(r"^\s*--?[A-Za-z0-9]")
+
+T = TypeVar("T")
+R = TypeVar("R")
+ParsedMan = tuple[str, str, Dict[str, str], str]
 
 load_dotenv()
 
@@ -96,9 +171,13 @@ class CommandDocument:
     sections: List[str]
     tldr_languages: List[str]
     sources: List[str]
+    language: str | None = None
+    section: str | None = None
+    chunk_index: int | None = None
+    aliases: List[str] = field(default_factory=list)
 
     def payload(self) -> Dict[str, object]:
-        return {
+        payload: Dict[str, object] = {
             "command": self.command,
             "languages": self.languages,
             "sections": self.sections,
@@ -106,28 +185,558 @@ class CommandDocument:
             "sources": self.sources,
             "document": self.text,
         }
+        if self.language is not None:
+            payload["language"] = self.language
+        if self.section is not None:
+            payload["section"] = self.section
+            payload["chunk"] = self.chunk_index
+        if self.aliases:
+            payload["aliases"] = self.aliases
+        return payload
+
+    def point_id(self) -> str:
+        return document_point_id(self.command, self.language, self.section, self.chunk_index)
+
+    def content_hash(self) -> str:
+        encoded = json.dumps(self.payload(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IngestManifest:
+    """What the last successful run indexed, so reruns only touch what changed.
+
+    ``files`` maps repo-relative source paths (man files or .deb archives) to
+    their size, mtime, content hash and the commands they provide.
+    ``documents`` maps each command to the hash of its TLDR entries and the
+    content hash of every point it produced.
+    """
+
+    collection: str = ""
+    model: str = ""
+    split: str = "command"
+    files: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    documents: Dict[str, Dict[str, object]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "IngestManifest":
+        if not path.exists():
+            return cls()
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != MANIFEST_VERSION:
+            return cls()
+        return cls(
+            collection=data.get("collection", ""),
+            model=data.get("model", ""),
+            split=data.get("split", "command"),
+            files=data.get("files", {}),
+            documents=data.get("documents", {}),
+        )
+
+    def save(self, path: Path) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "collection": self.collection,
+            "model": self.model,
+            "split": self.split,
+            "files": self.files,
+            "documents": self.documents,
+        }
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(data, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class VectorStorage:
+    """How the collection stores and indexes vectors (quantization, disk, HNSW).
+
+    ``None`` means "not requested": a new collection gets Qdrant's default and
+    an existing one keeps its current setting. ``quantization="none"`` is the
+    explicit way to drop quantization from an existing collection.
+    """
+
+    quantization: str | None = None
+    always_ram: bool = True
+    quantile: float | None = None
+    product_compression: str = "x16"
+    on_disk: bool | None = None
+    hnsw_m: int | None = None
+    hnsw_ef_construct: int | None = None
+
+    def quantization_config(self) -> qmodels.QuantizationConfig | None:
+        if self.quantization == "scalar":
+            return qmodels.ScalarQuantization(
+                scalar=qmodels.ScalarQuantizationConfig(
+                    type=qmodels.ScalarType.INT8,
+                    quantile=self.quantile,
+                    always_ram=self.always_ram,
+                )
+            )
+        if self.quantization == "product":
+            return qmodels.ProductQuantization(
+                product=qmodels.ProductQuantizationConfig(
+                    compression=qmodels.CompressionRatio(self.product_compression),
+                    always_ram=self.always_ram,
+                )
+            )
+        if self.quantization == "binary":
+            return qmodels.BinaryQuantization(
+                binary=qmodels.BinaryQuantizationConfig(always_ram=self.always_ram)
+            )
+        return None
+
+    def hnsw_config(self) -> qmodels.HnswConfigDiff | None:
+        if self.hnsw_m is None and self.hnsw_ef_construct is None:
+            return None
+        return qmodels.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+
+class UpsertCheckpoint:
+    """Append-only log of points Qdrant has acknowledged during the current run.
+
+    The first line identifies the run (collection, model, layout); every later
+    line holds one acknowledged batch as point id -> content hash and is
+    fsynced before the next batch is recorded, so a crash loses at most the
+    batch in flight. Resuming skips a document only if its point id was
+    acknowledged with the same content hash, which stays correct when the
+    document set or batch order changed since the checkpoint.
+    """
+
+    def __init__(self, path: Path, run: Dict[str, str]):
+        self.path = path
+        self.run = run
+        self._handle = None
+
+    def load(self) -> Dict[str, str]:
+        """Acknowledged point id -> content hash, or {} if the log is for another run."""
+        if not self.path.exists():
+            return {}
+        acked: Dict[str, str] = {}
+        with self.path.open(encoding="utf-8") as handle:
+            lines = iter(handle)
+            try:
+                if json.loads(next(lines, "null")) != self.run:
+                    return {}
+                for line in lines:
+                    acked.update(json.loads(line))
+            except json.JSONDecodeError:
+                pass  # torn final line from a crash mid-write
+        return acked
+
+    def start(self, acked: Dict[str, str]) -> None:
+        """Open the log, rewriting it to hold only ``acked`` for this run."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("w", encoding="utf-8")
+        self._handle.write(json.dumps(self.run) + "\n")
+        if acked:
+            self._handle.write(json.dumps(acked) + "\n")
+        self._sync()
+
+    def record(self, documents: Sequence["CommandDocument"]) -> None:
+        if self._handle is None:
+            return
+        self._handle.write(
+            json.dumps({doc.point_id(): doc.content_hash() for doc in documents}) + "\n"
+        )
+        self._sync()
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def discard(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def _sync(self) -> None:
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+
+class EmbeddingCache:
+    """Persistent text-hash -> vector cache for one model/normalization setting.
+
+    Vectors live in an append-only float32 file read through ``np.memmap``;
+    ``index.json`` maps the sha256 of each text to its row. Rows appended after
+    the last ``flush`` are simply unreferenced if a run dies. A row cut short by
+    a crash is truncated away before the next append, and index entries past the
+    last whole row are dropped on load, so rows and offsets never drift apart.
+    """
+
+    def __init__(self, root: Path, model_name: str, normalize: bool) -> None:
+        namespace = hashlib.sha256(f"{model_name}\0{normalize}".encode("utf-8")).hexdigest()[:16]
+        self.directory = root / namespace
+        self.vectors_path = self.directory / "vectors.f32"
+        self.index_path = self.directory / "index.json"
+        self.model_name = model_name
+        self.normalize = normalize
+        self.dim = 0
+        self.rows: Dict[str, int] = {}
+        self._matrix: np.ndarray | None = None
+        if self.index_path.exists():
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            self.dim = int(data.get("dim", 0))
+            count = self._row_count()
+            self.rows = {key: row for key, row in data.get("rows", {}).items() if row < count}
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _row_count(self) -> int:
+        if not self.dim or not self.vectors_path.exists():
+            return 0
+        return self.vectors_path.stat().st_size // (4 * self.dim)
+
+    def _vectors(self) -> np.ndarray | None:
+        if self._matrix is None:
+            rows = self._row_count()
+            if rows:
+                self._matrix = np.memmap(
+                    self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim)
+                )
+        return self._matrix
+
+    def lookup(self, texts: Sequence[str]) -> List[np.ndarray | None]:
+        matrix = self._vectors()
+        found: List[np.ndarray | None] = []
+        for text in texts:
+            row = self.rows.get(self.key(text))
+            found.append(
+                np.array(matrix[row]) if matrix is not None and row is not None else None
+            )
+        return found
+
+    def add(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not len(texts):
+            return
+        if self.dim != vectors.shape[1]:
+            self.dim = vectors.shape[1]
+            self.rows = {}
+            self.vectors_path.unlink(missing_ok=True)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._matrix = None
+        start = self._row_count()
+        with self.vectors_path.open("ab") as handle:
+            # Drop a partial row left by an interrupted write, so the append
+            # starts exactly at row ``start``.
+            handle.truncate(start * 4 * self.dim)
+            handle.write(vectors.tobytes())
+        for offset, text in enumerate(texts):
+            self.rows[self.key(text)] = start + offset
+        self._matrix = None
+
+    def flush(self) -> None:
+        if not self.dim:
+            return
+        data = {
+            "model": self.model_name,
+            "normalize": self.normalize,
+            "dim": self.dim,
+            "rows": self.rows,
+        }
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.index_path)
+
+
+class RunReport:
+    """Per-stage wall time, CPU time, item counts and memory high-water marks.
+
+    ``stage()`` times a block of ``main``; ``add()`` accumulates work that is
+    spread over many calls or threads (tokenization, encoding, upserts, parsing
+    inside worker processes). CPU time includes reaped worker processes. RSS
+    figures are always recorded; tracemalloc peaks only with ``trace_memory``,
+    since tracing slows parsing down noticeably.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, float]]:
+        record: Dict[str, float] = {"items": 0}
+        times = os.times()
+        cpu_start = times.user + times.system + times.children_user + times.children_system
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            times = os.times()
+            record["wall_seconds"] = round(time.perf_counter() - start, 6)
+            record["cpu_seconds"] = round(
+                times.user + times.system + times.children_user + times.children_system
+                - cpu_start,
+                6,
+            )
+            record.update(memory_snapshot())
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record["traced_mb"] = round(current / 2**20, 2)
+                record["traced_peak_mb"] = round(peak / 2**20, 2)
+            self.stages[name] = record
+
+    def add(self, name: str, seconds: float, items: int = 1) -> None:
+        with self._lock:
+            total = self.totals.setdefault(name, {"wall_seconds": 0.0, "items": 0, "calls": 0})
+            total["wall_seconds"] += seconds
+            total["items"] += items
+            total["calls"] += 1
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "started": self.started,
+            "wall_seconds": round(time.time() - self.started, 6),
+            "stages": self.stages,
+            "totals": {
+                name: {**total, "wall_seconds": round(total["wall_seconds"], 6)}
+                for name, total in self.totals.items()
+            },
+            **memory_snapshot(),
+        }
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.as_dict(), indent=2) + "\n", encoding="utf-8")
+
+    def summary(self) -> List[str]:
+        lines = [
+            f"{name:>18}: {record['wall_seconds']:9.3f}s wall {record['cpu_seconds']:9.3f}s cpu "
+            f"{int(record['items']):8d} items  rss {record.get('rss_mb', 0):8.1f} MB"
+            for name, record in self.stages.items()
+        ]
+        lines.extend(
+            f"{name:>18}: {total['wall_seconds']:9.3f}s over {int(total['calls'])} calls "
+            f"{int(total['items']):8d} items"
+            for name, total in self.totals.items()
+        )
+        return lines
+
+
+def memory_snapshot() -> Dict[str, float]:
+    """Current and peak resident set size of this process, in MiB."""
+    snapshot: Dict[str, float] = {}
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            resident_pages = int(handle.read().split()[1])
+        snapshot["rss_mb"] = round(resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 2)
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        # ru_maxrss is KiB on Linux.
+        snapshot["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+    return snapshot
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Index man pages into Qdrant.")
+    parser.add_argument(
+        "--source",
+        choices=("extracted", "debs"),
+        default="extracted",
+        help="Read man pages from an extracted tree or stream them out of .deb archives.",
+    )
     parser.add_argument("--man-root", type=Path, default=DEFAULT_MAN_ROOT)
+    parser.add_argument("--deb-root", type=Path, default=DEFAULT_DEB_ROOT)
     parser.add_argument("--tldr-root", type=Path, default=DEFAULT_TLDR_ROOT)
     parser.add_argument(
         "--collection",
         type=str,
         default=os.getenv("QDRANT_COLLECTION", "linux_commands"),
     )
+    parser.add_argument(
+        "--split",
+        choices=sorted(DOCUMENT_BUILDERS),
+        default=os.getenv("QDRANT_DOCUMENT_SPLIT", "command"),
+        help=(
+            "Point granularity: one merged document per command, one per "
+            "(command, language), or one per (command, language, section chunk)."
+        ),
+    )
+    parser.add_argument(
+        "--chunk-chars",
+        type=int,
+        default=DEFAULT_CHUNK_CHARS,
+        help="Maximum characters per section chunk with --split section.",
+    )
     parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument(
+        "--max-batch-tokens",
+        type=int,
+        default=0,
+        help="Padded-token budget per length-bucketed batch; replaces --batch-size when set.",
+    )
+    parser.add_argument(
+        "--upsert-in-flight",
+        type=int,
+        default=2,
+        help="Upserts allowed to run in the background while encoding (0 = synchronous).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("INGEST_WORKERS", "1")),
+        help="Processes used to parse man pages (0 = one per CPU).",
+    )
+    parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST_PATH)
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the manifest and re-parse, re-embed and re-upsert everything.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip documents the interrupted previous run already upserted "
+        "(tracked in a checkpoint log next to the manifest).",
+    )
+    parser.add_argument(
+        "--embedding-cache",
+        type=Path,
+        default=Path(os.getenv("EMBEDDING_CACHE_DIR", str(DEFAULT_EMBEDDING_CACHE_DIR))),
+    )
+    parser.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        help="Always run the model instead of reusing cached vectors.",
+    )
+    parser.add_argument(
+        "--export-vectors",
+        type=Path,
+        nargs="?",
+        const=Path(os.getenv("VECTOR_STORE_DIR") or DEFAULT_VECTOR_STORE_DIR),
+        default=None,
+        metavar="DIR",
+        help="After the run, export the collection as a memory-mapped vector store "
+        "for RETRIEVAL_BACKEND=local (default DIR: VECTOR_STORE_DIR).",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        default=Path(os.getenv("INGEST_REPORT", str(DEFAULT_REPORT_PATH))),
+        help="Where to write the JSON run report with per-stage timings and memory.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also record tracemalloc peaks per stage (slower).",
+    )
     parser.add_argument(
         "--device",
         type=str,
         default=os.getenv("EMBEDDING_DEVICE", "cpu"),
     )
+    parser.add_argument(
+        "--embedding-backend",
+        choices=BACKENDS,
+        default=EMBEDDING_BACKEND,
+        help="torch: fp32 SentenceTransformer; onnx: int8-quantized ONNX on onnxruntime CPU.",
+    )
+    parser.add_argument(
+        "--embedding-dim",
+        type=int,
+        default=EMBEDDING_DIM,
+        help="Truncate vectors to this many (Matryoshka) dimensions; 0 keeps the full size.",
+    )
     parser.add_argument("--qdrant-url", type=str, default=os.getenv("QDRANT_URL"))
     parser.add_argument("--qdrant-host", type=str, default=os.getenv("QDRANT_HOST", "localhost"))
     parser.add_argument("--qdrant-port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument(
+        "--qdrant-grpc-port", type=int, default=int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    )
+    parser.add_argument(
+        "--prefer-grpc",
+        action="store_true",
+        default=os.getenv("QDRANT_PREFER_GRPC", "").lower() in {"1", "true", "yes"},
+        help="Talk to Qdrant over gRPC instead of HTTP/JSON.",
+    )
+    parser.add_argument(
+        "--bulk-upload",
+        type=int,
+        default=int(os.getenv("QDRANT_UPLOAD_PARALLEL", "0")),
+        metavar="WORKERS",
+        help="Embed everything, then send the float32 matrix in one upload_collection call "
+        "with this many parallel upload processes (0 = per-batch upserts). Holds all "
+        "vectors in memory (about 30 MB per 10k 768-d points) and ignores "
+        "--upsert-in-flight; with --resume, an interrupted bulk upload starts over.",
+    )
     parser.add_argument("--qdrant-api-key", type=str, default=os.getenv("QDRANT_API_KEY"))
     parser.add_argument("--timeout", type=int, default=int(os.getenv("QDRANT_TIMEOUT", "60")))
+    parser.add_argument(
+        "--quantization",
+        choices=("none", "scalar", "product", "binary"),
+        default=os.getenv("QDRANT_QUANTIZATION") or None,
+        help="Quantize stored vectors: scalar int8 (4x smaller), product or binary (32x). "
+        "Unset keeps an existing collection's quantization; 'none' removes it.",
+    )
+    parser.add_argument(
+        "--quantization-always-ram",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() in {"1", "true", "yes"},
+        help="Pin quantized vectors in RAM while originals may stay on disk.",
+    )
+    parser.add_argument(
+        "--quantization-quantile",
+        type=float,
+        default=float(os.getenv("QDRANT_QUANTIZATION_QUANTILE"))
+        if os.getenv("QDRANT_QUANTIZATION_QUANTILE")
+        else None,
+        help="Scalar quantization quantile used to clip outliers (e.g. 0.99).",
+    )
+    parser.add_argument(
+        "--product-compression",
+        choices=("x4", "x8", "x16", "x32", "x64"),
+        default=os.getenv("QDRANT_PRODUCT_COMPRESSION", "x16"),
+    )
+    parser.add_argument(
+        "--on-disk-vectors",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("QDRANT_ON_DISK_VECTORS", "").lower() in {"1", "true", "yes"}
+        if os.getenv("QDRANT_ON_DISK_VECTORS")
+        else None,
+        help="Keep original vectors memory-mapped on disk instead of in RAM. "
+        "Unset keeps an existing collection's setting.",
+    )
+    parser.add_argument(
+        "--hnsw-m",
+        type=int,
+        default=int(os.getenv("QDRANT_HNSW_M")) if os.getenv("QDRANT_HNSW_M") else None,
+        help="HNSW edges per node; lower saves RAM, higher improves recall.",
+    )
+    parser.add_argument(
+        "--hnsw-ef-construct",
+        type=int,
+        default=int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT"))
+        if os.getenv("QDRANT_HNSW_EF_CONSTRUCT")
+        else None,
+    )
+    actions = parser.add_subparsers(dest="action", metavar="{snapshot,restore}")
+    snapshot = actions.add_parser(
+        "snapshot",
+        help="Snapshot the collection of the last completed run, with model metadata.",
+    )
+    snapshot.add_argument("--output", type=Path, default=DEFAULT_SNAPSHOT_DIR)
+    restore = actions.add_parser(
+        "restore",
+        help="Restore a snapshot (local file or URL) into Qdrant without embedding anything.",
+    )
+    restore.add_argument("snapshot", type=str, help="Path or URL of a .snapshot file.")
+    restore.add_argument(
+        "--force",
+        action="store_true",
+        help="Replace the collection if it already exists.",
+    )
     return parser.parse_args()
 
 
@@ -144,7 +753,7 @@ def discover_man_files(man_root: Path) -> Iterator[Path]:
             yield path
 
 
-def looks_like_man_page(path: Path) -> bool:
+def looks_like_man_page(path: PurePath) -> bool:
     name = path.name
     if name.endswith(".gz"):
         name = name[:-3]
@@ -154,13 +763,13 @@ def looks_like_man_page(path: Path) -> bool:
     return suffix in MAN_SECTION_SUFFIXES
 
 
-def detect_language(path: Path, root: Path) -> str:
-    rel = path.relative_to(root)
+def detect_language(path: PurePath, root: PurePath | None = None) -> str:
+    rel = path.relative_to(root) if root is not None else path
     first = rel.parts[0]
     return "en" if first.startswith("man") else first
 
 
-def command_from_path(path: Path) -> str:
+def command_from_path(path: PurePath) -> str:
     name = path.name
     if name.endswith(".gz"):
         name = name[:-3]
@@ -183,6 +792,7 @@ def strip_formatting(line: str) -> str:
     return line.strip()
 
 
+@functools.lru_cache(maxsize=4096)
 def normalize_header(raw: str) -> str | None:
     ascii_text = (
         unicodedata.normalize("NFKD", raw)
@@ -198,6 +808,65 @@ def normalize_header(raw: str) -> str | None:
 
 
 def extract_sections(text: str) -> Dict[str, str]:
+    r"""Render the NAME/SYNOPSIS/DESCRIPTION/OPTIONS sections of a roff page.
+
+    Header lines are located with one regex scan over the page, so sections we
+    do not keep are skipped without looking at their lines. Inside kept
+    sections only macro lines are visited individually, and ``\f``, ``\s`` and
+    ``\-`` escapes are removed by one ``ROFF_ESCAPE_RE`` pass per section. Output
+    matches ``extract_sections_regex``; see benchmarks/roff_bench.py.
+    """
+    if not any(mark in text for mark in LINE_BREAKS):
+        normalized = "\n" + text
+    else:
+        normalized = "\n" + "\n".join(text.splitlines())
+    headers = []
+    for match in HEADER_LINE_RE.finditer(normalized):
+        header = _section_header(match.group()[1:].rstrip())
+        if header is not None:
+            headers.append((match, normalize_header(header)))
+    raw_sections: Dict[str, List[str]] = defaultdict(list)
+    for idx, (match, canonical) in enumerate(headers):
+        if canonical is None:
+            continue
+        end = headers[idx + 1][0].start() if idx + 1 < len(headers) else len(normalized)
+        raw_sections[canonical].append(
+            MACRO_LINE_RE.sub(_render_macro_match, normalized[match.end() : end])
+        )
+    sections: Dict[str, str] = {}
+    for key, chunks in raw_sections.items():
+        lines = ROFF_ESCAPE_RE.sub("", "".join(chunks)).split("\n")
+        body = "\n".join([line for line in map(str.strip, lines) if line])
+        if body:
+            sections[key] = body
+    return sections
+
+
+def _section_header(line: str) -> str | None:
+    """Header text of a ``.SH``/``.SS`` line, or None when SECTION_RE would not match."""
+    if not line[3:4].isspace():
+        return None
+    rest = line[3:].lstrip()
+    header = (rest[1:] if rest.startswith('"') else rest).split('"', 1)[0]
+    if header:
+        return header
+    match = SECTION_RE.match(line)
+    return match.group(1) if match else None
+
+
+def _render_macro_match(match: re.Match[str]) -> str:
+    line = match.group()[1:].rstrip()
+    parts = line.split(None, 1)
+    macro = parts[0][1:]
+    if not (0 < len(macro) <= 2 and macro.isascii() and macro.isalpha() and macro.isupper()):
+        return "\n" + line
+    if macro in DROPPED_MACROS or len(parts) < 2:
+        return "\n"
+    return "\n" + parts[1]
+
+
+def extract_sections_regex(text: str) -> Dict[str, str]:
+    """Per-line regex implementation kept as the reference for benchmarks."""
     sections: Dict[str, List[str]] = defaultdict(list)
     current: str | None = None
     for raw_line in text.splitlines():
@@ -231,6 +900,232 @@ def _render_macro_line(line: str) -> str:
     return value
 
 
+def parse_man_text(rel_path: PurePath, text: str, source: str) -> ParsedMan | None:
+    """Parse man source found at ``rel_path`` (relative to a man root)."""
+    command = command_from_path(rel_path)
+    if not command:
+        return None
+    language = detect_language(rel_path)
+    sections = extract_sections(text)
+    if not sections:
+        sections = {"DESCRIPTION": strip_formatting(text)}
+    return command, language, sections, source
+
+
+def parse_man_file(path: Path, man_root: Path) -> ParsedMan | None:
+    """Parse one man file into (command, language, sections, repo-relative path)."""
+    return parse_man_file_timed(path, man_root)[0]
+
+
+def parse_man_file_timed(
+    path: Path, man_root: Path
+) -> tuple[ParsedMan | None, float, float]:
+    """``parse_man_file`` plus seconds spent reading/decompressing and rendering."""
+    if not command_from_path(path):
+        return None, 0.0, 0.0
+    start = time.perf_counter()
+    text = read_man_file(path)
+    read_seconds = time.perf_counter() - start
+    parsed = parse_man_text(path.relative_to(man_root), text, str(path.relative_to(REPO_ROOT)))
+    return parsed, read_seconds, time.perf_counter() - start - read_seconds
+
+
+def read_ar_members(handle: BinaryIO) -> Iterator[tuple[str, BinaryIO]]:
+    """Yield (name, reader) for each member of an ar archive such as a .deb.
+
+    Each reader is bounded to its member and must be consumed before advancing.
+    """
+    if handle.read(len(AR_MAGIC)) != AR_MAGIC:
+        raise ValueError(f"{getattr(handle, 'name', 'archive')} is not an ar archive")
+    while True:
+        header = handle.read(60)
+        if len(header) < 60:
+            return
+        name = header[:16].decode("ascii", "ignore").strip().rstrip("/")
+        size = int(header[48:58].decode("ascii").strip())
+        reader = _BoundedReader(handle, size)
+        yield name, reader
+        reader.read()
+        if size % 2:
+            handle.read(1)
+
+
+class _BoundedReader:
+    def __init__(self, handle: BinaryIO, size: int) -> None:
+        self._handle = handle
+        self._remaining = size
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._handle.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+def _archive_path(name: str) -> PurePosixPath:
+    return PurePosixPath(posixpath.normpath(name.lstrip("/").removeprefix("./")))
+
+
+def iter_deb_man_pages(
+    deb_path: Path,
+) -> Iterator[tuple[PurePosixPath, bytes, PurePosixPath | None]]:
+    """Stream man pages out of a .deb as (path, raw bytes, link target).
+
+    Paths are relative to usr/share/man. Regular files come with their bytes
+    and no target; symlinks and hardlinks to man pages in the same package
+    come last, with empty bytes and the path of the file they resolve to.
+    """
+    with deb_path.open("rb") as handle:
+        for name, reader in read_ar_members(handle):
+            if not name.startswith("data.tar"):
+                continue
+            files: set[PurePosixPath] = set()
+            links: Dict[PurePosixPath, PurePosixPath] = {}
+            with tarfile.open(fileobj=reader, mode="r|*") as tar:
+                for member in tar:
+                    path = _archive_path(member.name)
+                    if not path.is_relative_to(DEB_MAN_PREFIX) or not looks_like_man_page(path):
+                        continue
+                    if member.isfile():
+                        extracted = tar.extractfile(member)
+                        if extracted is not None:
+                            files.add(path)
+                            yield path.relative_to(DEB_MAN_PREFIX), extracted.read(), None
+                    elif member.issym():
+                        links[path] = _archive_path(
+                            posixpath.join(str(path.parent), member.linkname)
+                        )
+                    elif member.islnk():
+                        links[path] = _archive_path(member.linkname)
+            for path, target in links.items():
+                hops = 0
+                while target not in files and target in links and hops < len(links):
+                    target = links[target]
+                    hops += 1
+                if target in files:
+                    yield (
+                        path.relative_to(DEB_MAN_PREFIX),
+                        b"",
+                        target.relative_to(DEB_MAN_PREFIX),
+                    )
+            return
+
+
+def decode_man_bytes(path: PurePath, data: bytes) -> str:
+    if path.suffix == ".gz":
+        data = gzip.decompress(data)
+    return data.decode("utf-8", errors="ignore")
+
+
+def so_target(text: str) -> str | None:
+    """Target of a ``.so man1/other.1`` include stub, if ``text`` is one."""
+    stripped = text.lstrip()
+    if not stripped.startswith(".so"):
+        return None
+    first_line = stripped.split("\n", 1)[0].split()
+    if len(first_line) != 2 or first_line[0] != ".so":
+        return None
+    return first_line[1]
+
+
+def parse_deb(deb_path: Path) -> tuple[List[ParsedMan], Dict[str, str]]:
+    """Parse one .deb into its real man pages and an alias -> command map.
+
+    Links and ``.so`` stubs are not parsed; they only record which command
+    they stand for, so each real page is parsed exactly once.
+    """
+    deb_source = str(deb_path.relative_to(REPO_ROOT))
+    parsed: List[ParsedMan] = []
+    aliases: Dict[str, str] = {}
+    for rel_path, data, target in iter_deb_man_pages(deb_path):
+        text = decode_man_bytes(rel_path, data) if target is None else ""
+        include = so_target(text) if target is None else None
+        if target is not None or include is not None:
+            alias = command_from_path(rel_path)
+            canonical = command_from_path(target or PurePosixPath(include or ""))
+            if alias and canonical and alias != canonical:
+                aliases[alias] = canonical
+            continue
+        result = parse_man_text(rel_path, text, f"{deb_source}:{DEB_MAN_PREFIX / rel_path}")
+        if result is not None:
+            parsed.append(result)
+    return parsed, aliases
+
+
+def discover_debs(deb_root: Path) -> Iterator[Path]:
+    yield from deb_root.glob("*.deb")
+
+
+def map_in_processes(
+    func: Callable[[T], R],
+    items: Sequence[T],
+    workers: int,
+    desc: str,
+    unit: str,
+) -> Iterator[R]:
+    """Yield ``func(item)`` for every item in order, on a process pool if ``workers != 1``."""
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        yield from tqdm((func(item) for item in items), total=len(items), desc=desc, unit=unit)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, min(64, len(items) // (workers * 8)))
+        results = executor.map(func, items, chunksize=chunksize)
+        yield from tqdm(results, total=len(items), desc=desc, unit=unit)
+
+
+def add_man_record(
+    man_index: Dict[str, Dict[str, ManRecord]],
+    command: str,
+    language: str,
+    sections: Dict[str, str],
+    source: str,
+) -> None:
+    record = man_index[command].get(language)
+    if record:
+        merged = merge_sections(record.sections, sections)
+        if score_sections(merged) >= score_sections(record.sections):
+            man_index[command][language] = ManRecord(language, merged, source)
+    else:
+        man_index[command][language] = ManRecord(language, sections, source)
+
+
+def parse_man_pages(
+    paths: Sequence[Path],
+    man_root: Path,
+    workers: int = 1,
+    report: RunReport | None = None,
+) -> Dict[str, Dict[str, ManRecord]]:
+    """Parse man files, optionally across processes, merging results in input order.
+
+    Workers only decompress and extract sections; the parent folds the parsed
+    records in the order of ``paths`` so the index is identical to a serial run.
+    Worker-side read and render times are summed into ``report``.
+    """
+    man_index: Dict[str, Dict[str, ManRecord]] = defaultdict(dict)
+    parse = functools.partial(parse_man_file_timed, man_root=man_root)
+    for parsed, read_seconds, render_seconds in map_in_processes(
+        parse, paths, workers, "Parsing man pages", "file"
+    ):
+        if report is not None:
+            report.add("read_gzip", read_seconds)
+            report.add("extract_sections", render_seconds)
+        if parsed is not None:
+            add_man_record(man_index, *parsed)
+    return man_index
+
+
+def parse_deb_pages(
+    paths: Sequence[Path],
+    workers: int = 1,
+) -> Dict[Path, tuple[List[ParsedMan], Dict[str, str]]]:
+    """Parse .deb archives, one package per task, keyed by archive path."""
+    results = map_in_processes(parse_deb, paths, workers, "Parsing .deb packages", "deb")
+    return dict(zip(paths, results, strict=True))
+
+
 def merge_sections(primary: Dict[str, str], incoming: Dict[str, str]) -> Dict[str, str]:
     merged = dict(primary)
     for key, value in incoming.items():
@@ -314,6 +1209,18 @@ def format_man_block(language: str, record: ManRecord) -> tuple[str, List[str]]:
     return "\n\n".join(section_lines).strip(), sections_present
 
 
+def format_tldr_block(entries: List[Dict[str, str]]) -> tuple[str, List[str]]:
+    tldr_parts = ["### TLDR Examples"]
+    sources: List[str] = []
+    for entry in sorted(entries, key=lambda item: (item["language"], item["category"])):
+        tldr_parts.append(
+            f"[{entry['language']} • {entry['category']}]"
+            f"\n{entry['content']}"
+        )
+        sources.append(entry["source"])
+    return "\n\n".join(tldr_parts).strip(), sources
+
+
 def build_documents(
     man_records: Dict[str, Dict[str, ManRecord]],
     tldr_records: Dict[str, List[Dict[str, str]]],
@@ -342,19 +1249,11 @@ def build_documents(
             languages.append(lang)
             sections_present.extend(block_sections)
             sources.append(record.source)
+        tldr_languages = [entry["language"] for entry in tldr_entries]
         if tldr_entries:
-            tldr_parts = ["### TLDR Examples"]
-            tldr_languages: List[str] = []
-            for entry in sorted(tldr_entries, key=lambda item: (item["language"], item["category"])):
-                tldr_languages.append(entry["language"])
-                tldr_parts.append(
-                    f"[{entry['language']} • {entry['category']}]"
-                    f"\n{entry['content']}"
-                )
-                sources.append(entry["source"])
-            parts.append("\n\n".join(tldr_parts).strip())
-        else:
-            tldr_languages = []
+            block, block_sources = format_tldr_block(tldr_entries)
+            parts.append(block)
+            sources.extend(block_sources)
         if not parts:
             continue
         documents.append(
@@ -370,28 +1269,527 @@ def build_documents(
     return documents
 
 
-def ensure_collection(client: QdrantClient, collection: str, dim: int) -> None:
+def build_language_documents(
+    man_records: Dict[str, Dict[str, ManRecord]],
+    tldr_records: Dict[str, List[Dict[str, str]]],
+) -> List[CommandDocument]:
+    """Build one document per (command, language) instead of one merged blob."""
+    commands = sorted(set(man_records.keys()) | set(tldr_records.keys()))
+    documents: List[CommandDocument] = []
+    for command in commands:
+        man_by_lang = man_records.get(command, {})
+        tldr_by_lang: Dict[str, List[Dict[str, str]]] = defaultdict(list)
+        for entry in tldr_records.get(command, []):
+            tldr_by_lang[entry["language"]].append(entry)
+        for lang in sorted(set(man_by_lang) | set(tldr_by_lang)):
+            parts: List[str] = []
+            sections_present: List[str] = []
+            sources: List[str] = []
+            record = man_by_lang.get(lang)
+            if record:
+                block, sections_present = format_man_block(lang, record)
+                parts.append(block)
+                sources.append(record.source)
+            tldr_entries = tldr_by_lang.get(lang, [])
+            if tldr_entries:
+                block, block_sources = format_tldr_block(tldr_entries)
+                parts.append(block)
+                sources.extend(block_sources)
+            documents.append(
+                CommandDocument(
+                    command=command,
+                    text="\n\n".join(parts),
+                    languages=[lang] if record else [],
+                    sections=sorted(set(sections_present)),
+                    tldr_languages=[lang] if tldr_entries else [],
+                    sources=sources,
+                    language=lang,
+                )
+            )
+    return documents
+
+
+def split_section_text(section: str, text: str, max_chars: int) -> List[str]:
+    """Split a section into chunks of at most ``max_chars`` on natural boundaries.
+
+    OPTIONS is cut where a line starts a new flag, so an option and its
+    description stay together; other sections, and single options that are
+    themselves too long, are cut on line boundaries.
+    """
+    units: List[List[str]] = []
+    for line in text.splitlines():
+        if not units or section != "OPTIONS" or FLAG_LINE_RE.match(line):
+            units.append([line])
+        else:
+            units[-1].append(line)
+    units = [
+        piece
+        for unit in units
+        for piece in ([unit] if len("\n".join(unit)) <= max_chars else [[line] for line in unit])
+    ]
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for unit in units:
+        unit_text = "\n".join(unit)
+        if current and size + len(unit_text) + 1 > max_chars:
+            chunks.append("\n".join(current).strip())
+            current = []
+            size = 0
+        current.append(unit_text)
+        size += len(unit_text) + 1
+    if current:
+        chunks.append("\n".join(current).strip())
+    return [chunk for chunk in chunks if chunk]
+
+
+def build_section_documents(
+    man_records: Dict[str, Dict[str, ManRecord]],
+    tldr_records: Dict[str, List[Dict[str, str]]],
+    max_chars: int = DEFAULT_CHUNK_CHARS,
+) -> List[CommandDocument]:
+    """Build one document per (command, language, section chunk).
+
+    Each chunk is prefixed with its command and section so it embeds on its own;
+    TLDR pages become a ``TLDR`` chunk of their language.
+    """
+    commands = sorted(set(man_records.keys()) | set(tldr_records.keys()))
+    documents: List[CommandDocument] = []
+    for command in commands:
+        man_by_lang = man_records.get(command, {})
+        tldr_by_lang: Dict[str, List[Dict[str, str]]] = defaultdict(list)
+        for entry in tldr_records.get(command, []):
+            tldr_by_lang[entry["language"]].append(entry)
+        for lang in sorted(set(man_by_lang) | set(tldr_by_lang)):
+            label = "English" if lang == "en" else lang
+            record = man_by_lang.get(lang)
+            for section_name in CHUNK_SECTIONS if record else ():
+                value = record.sections.get(section_name)
+                if not value:
+                    continue
+                for idx, chunk in enumerate(split_section_text(section_name, value, max_chars)):
+                    documents.append(
+                        CommandDocument(
+                            command=command,
+                            text=f"{command} ({label}) {section_name.title()}:\n{chunk}",
+                            languages=[lang],
+                            sections=[section_name],
+                            tldr_languages=[],
+                            sources=[record.source],
+                            language=lang,
+                            section=section_name,
+                            chunk_index=idx,
+                        )
+                    )
+            tldr_entries = tldr_by_lang.get(lang, [])
+            if tldr_entries:
+                block, block_sources = format_tldr_block(tldr_entries)
+                documents.append(
+                    CommandDocument(
+                        command=command,
+                        text=f"{command} ({label}) {block.lstrip('# ')}",
+                        languages=[],
+                        sections=[],
+                        tldr_languages=[lang],
+                        sources=block_sources,
+                        language=lang,
+                        section="TLDR",
+                        chunk_index=0,
+                    )
+                )
+    return documents
+
+
+DOCUMENT_BUILDERS = {
+    "command": build_documents,
+    "language": build_language_documents,
+    "section": build_section_documents,
+}
+PAYLOAD_INDEXES = {
+    "command": ("aliases",),
+    "language": ("command", "language", "aliases"),
+    "section": ("command", "language", "section", "aliases"),
+}
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tldr_digest(entries: List[Dict[str, str]]) -> str:
+    encoded = json.dumps(
+        sorted(entries, key=lambda item: (item["language"], item["category"], item["source"])),
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def scan_source_changes(
+    paths: Sequence[Path],
+    manifest: IngestManifest,
+    commands_of: Callable[[Path], List[str]] | None = None,
+) -> tuple[Dict[str, Dict[str, object]], set[str], set[str]]:
+    """Fingerprint source files against the manifest.
+
+    Returns the new file table, the repo-relative paths that changed, and the
+    commands known to be affected. Files whose size and mtime match the
+    manifest are trusted without reading; anything else is hashed, so a
+    touched-but-identical file is not a change. ``commands_of`` names the
+    commands a file provides when that is known without parsing (plain man
+    files); for .deb archives it is filled in once the package is parsed.
+    """
+    files: Dict[str, Dict[str, object]] = {}
+    changed_paths: set[str] = set()
+    changed: set[str] = set()
+    for path in paths:
+        rel_path = str(path.relative_to(REPO_ROOT))
+        stat = path.stat()
+        previous = manifest.files.get(rel_path)
+        if (
+            previous
+            and previous.get("size") == stat.st_size
+            and previous.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            files[rel_path] = previous
+            continue
+        entry: Dict[str, object] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_digest(path),
+            "commands": commands_of(path) if commands_of else [],
+        }
+        if not previous or previous.get("sha256") != entry["sha256"]:
+            changed_paths.add(rel_path)
+            changed.update(entry["commands"])
+            if previous:
+                changed.update(previous.get("commands", []))
+        elif not commands_of:
+            entry["commands"] = previous.get("commands", [])
+            entry["aliases"] = previous.get("aliases", {})
+        files[rel_path] = entry
+    for rel_path, previous in manifest.files.items():
+        if rel_path not in files:
+            changed.update(previous.get("commands", []))
+    changed.discard("")
+    return files, changed_paths, changed
+
+
+def load_deb_index(
+    debs: Sequence[Path],
+    file_table: Dict[str, Dict[str, object]],
+    manifest: IngestManifest,
+    changed_paths: set[str],
+    changed_commands: set[str],
+    workers: int,
+) -> Dict[str, Dict[str, ManRecord]]:
+    """Rebuild man records for changed commands straight from .deb archives.
+
+    Changed packages are parsed first, which reveals the commands and aliases
+    they provide now; unchanged packages are parsed only if they also ship one
+    of the changed commands (e.g. a translation package). ``file_table`` and
+    ``changed_commands`` are updated in place.
+    """
+    by_rel = {str(path.relative_to(REPO_ROOT)): path for path in debs}
+    parsed = parse_deb_pages([by_rel[rel] for rel in sorted(changed_paths)], workers)
+    for path, (records, aliases) in parsed.items():
+        rel = str(path.relative_to(REPO_ROOT))
+        commands = sorted({record[0] for record in records})
+        file_table[rel]["commands"] = commands
+        file_table[rel]["aliases"] = aliases
+        changed_commands.update(commands)
+        changed_commands.update(
+            alias_changes(manifest.files.get(rel, {}).get("aliases", {}), aliases)
+        )
+    related = [
+        path
+        for rel, path in sorted(by_rel.items())
+        if rel not in changed_paths
+        and changed_commands.intersection(file_table[rel]["commands"])
+    ]
+    parsed.update(parse_deb_pages(related, workers))
+    man_index: Dict[str, Dict[str, ManRecord]] = defaultdict(dict)
+    for path in debs:
+        records, _ = parsed.get(path, ([], {}))
+        for command, language, sections, source in records:
+            if command in changed_commands:
+                add_man_record(man_index, command, language, sections, source)
+    return man_index
+
+
+def alias_changes(old: Dict[str, str], new: Dict[str, str]) -> set[str]:
+    """Commands whose alias pointers differ between two alias maps."""
+    touched: set[str] = set()
+    for alias in set(old) | set(new):
+        if old.get(alias) != new.get(alias):
+            touched.add(alias)
+            touched.update(target for target in (old.get(alias), new.get(alias)) if target)
+    return touched
+
+
+def command_aliases(file_table: Dict[str, Dict[str, object]]) -> Dict[str, List[str]]:
+    """Canonical command -> alias commands that have no man page of their own."""
+    real: set[str] = set()
+    pointers: Dict[str, str] = {}
+    for entry in file_table.values():
+        pointers.update(entry.get("aliases", {}))
+        if "alias_of" in entry:
+            target = file_table.get(str(entry["alias_of"]))
+            if target is not None:
+                pointers[entry["commands"][0]] = target["commands"][0]
+        else:
+            real.update(entry["commands"])
+    by_canonical: Dict[str, List[str]] = defaultdict(list)
+    for alias, canonical in sorted(pointers.items()):
+        if alias and alias != canonical and alias not in real:
+            by_canonical[canonical].append(alias)
+    return by_canonical
+
+
+def resolve_man_aliases(
+    paths: Sequence[Path],
+    man_root: Path,
+    file_table: Dict[str, Dict[str, object]],
+) -> Dict[str, str]:
+    """Map every duplicate man file to the real page it stands for.
+
+    Symlinks, hardlinks and copies share a content hash, so each group of
+    identical files keeps one canonical member: a non-symlink whose command
+    appears earliest in the page's NAME line; copies in different language
+    directories are never merged. ``.so`` include stubs point at the page they
+    include; stubs that include each other in a loop are left as real pages.
+    Returns repo-relative alias path -> canonical path.
+    """
+    by_rel = {str(path.relative_to(REPO_ROOT)): path for path in paths}
+    alias_of: Dict[str, str] = {}
+    groups: Dict[tuple[str, str], List[str]] = defaultdict(list)
+    for rel, path in by_rel.items():
+        if int(file_table[rel]["size"]) <= SO_STUB_MAX_BYTES:
+            target = so_target(read_man_file(path))
+            if target is not None:
+                base = man_root / path.relative_to(man_root).parts[0]
+                base = man_root if base.name.startswith("man") else base
+                for candidate in (base / target, base / f"{target}.gz"):
+                    candidate_rel = str(candidate.relative_to(REPO_ROOT))
+                    if candidate_rel in by_rel and candidate_rel != rel:
+                        alias_of[rel] = candidate_rel
+                        break
+                continue
+        groups[(detect_language(path, man_root), str(file_table[rel]["sha256"]))].append(rel)
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        canonical = _canonical_member([by_rel[rel] for rel in members])
+        canonical_rel = str(canonical.relative_to(REPO_ROOT))
+        for rel in members:
+            if rel != canonical_rel:
+                alias_of[rel] = canonical_rel
+    resolved: Dict[str, str] = {}
+    for rel, target in alias_of.items():
+        seen = {rel}
+        while target in alias_of and target not in seen:
+            seen.add(target)
+            target = alias_of[target]
+        if target not in seen:
+            resolved[rel] = target
+    return resolved
+
+
+def _canonical_member(paths: List[Path]) -> Path:
+    candidates = sorted(path for path in paths if not path.is_symlink()) or sorted(paths)
+    name_line = extract_sections(read_man_file(candidates[0])).get("NAME", "").lower()
+
+    def position(path: Path) -> int:
+        match = re.search(
+            rf"(?<![\w.-]){re.escape(command_from_path(path))}(?![\w.-])", name_line
+        )
+        return match.start() if match else len(name_line) + 1
+
+    return min(candidates, key=lambda path: (position(path), str(path)))
+
+
+def collection_exists(client: QdrantClient, collection: str) -> bool:
+    """Whether ``collection`` exists; any other lookup failure propagates."""
     try:
+        client.get_collection(collection)
+    except qdrant_exceptions.UnexpectedResponse as exc:
+        if exc.status_code != 404:
+            raise
+        return False
+    except grpc.RpcError as exc:
+        if exc.code() != grpc.StatusCode.NOT_FOUND:
+            raise
+        return False
+    except ValueError as exc:
+        # The in-process client reports a missing collection this way.
+        if str(exc) != f"Collection {collection} not found":
+            raise
+        return False
+    return True
+
+
+def collection_dim(info: qmodels.CollectionInfo) -> int:
+    vectors = info.config.params.vectors
+    return vectors.size if isinstance(vectors, qmodels.VectorParams) else vectors["size"]
+
+
+def update_collection(
+    client: QdrantClient,
+    collection: str,
+    config: qmodels.CollectionConfig,
+    storage: VectorStorage,
+) -> None:
+    """Apply the parts of ``storage`` that differ from the collection's ``config``."""
+    changes: Dict[str, object] = {}
+    vectors = config.params.vectors
+    current_on_disk = bool(
+        vectors.on_disk if isinstance(vectors, qmodels.VectorParams) else vectors.get("on_disk")
+    )
+    if storage.on_disk is not None and storage.on_disk != current_on_disk:
+        changes["vectors_config"] = {"": qmodels.VectorParamsDiff(on_disk=storage.on_disk)}
+    hnsw = {
+        field: value
+        for field, value in (("m", storage.hnsw_m), ("ef_construct", storage.hnsw_ef_construct))
+        if value is not None and value != getattr(config.hnsw_config, field)
+    }
+    if hnsw:
+        changes["hnsw_config"] = qmodels.HnswConfigDiff(**hnsw)
+    if storage.quantization == "none":
+        if config.quantization_config is not None:
+            changes["quantization_config"] = qmodels.Disabled.DISABLED
+    elif storage.quantization is not None:
+        quantization = storage.quantization_config()
+        if quantization != config.quantization_config:
+            changes["quantization_config"] = quantization
+    if changes:
+        print(f"Updating collection '{collection}': {', '.join(changes)}")
+        client.update_collection(collection_name=collection, **changes)
+
+
+def ensure_collection(
+    client: QdrantClient,
+    collection: str,
+    dim: int,
+    payload_indexes: Sequence[str] = (),
+    storage: VectorStorage | None = None,
+) -> None:
+    """Create ``collection`` if needed, or bring an existing one to ``storage``.
+
+    Quantization, HNSW parameters and on-disk vectors can all be changed on a
+    live collection; Qdrant rebuilds the affected segments in the background.
+    Only settings ``storage`` asks for and the collection does not already have
+    are sent, so a plain rerun leaves the collection exactly as it was.
+    """
+    storage = storage or VectorStorage()
+    if collection_exists(client, collection):
         info = client.get_collection(collection)
-        existing_dim = info.config.params.vectors.size if isinstance(
-            info.config.params.vectors, qmodels.VectorParams
-        ) else info.config.params.vectors["size"]
+        existing_dim = collection_dim(info)
         if existing_dim != dim:
             raise RuntimeError(
-                f"Collection '{collection}' exists with vector size {existing_dim}, expected {dim}."
+                f"Collection '{collection}' exists with vector size {existing_dim}, "
+                f"expected {dim}. A different EMBEDDING_DIM needs a new collection: "
+                "drop this one or pass another --collection."
             )
-        return
-    except qdrant_exceptions.UnexpectedResponse:
-        pass
-    client.create_collection(
-        collection_name=collection,
-        vectors_config=qmodels.VectorParams(size=dim, distance=qmodels.Distance.COSINE),
-        optimizers_config=qmodels.OptimizersConfigDiff(
-            indexing_threshold=20000,
-            default_segment_number=2,
-        ),
-        on_disk_payload=True,
+        update_collection(client, collection, info.config, storage)
+    else:
+        client.create_collection(
+            collection_name=collection,
+            vectors_config=qmodels.VectorParams(
+                size=dim,
+                distance=qmodels.Distance.COSINE,
+                on_disk=storage.on_disk,
+            ),
+            hnsw_config=storage.hnsw_config(),
+            quantization_config=storage.quantization_config(),
+            optimizers_config=qmodels.OptimizersConfigDiff(
+                indexing_threshold=20000,
+                default_segment_number=2,
+            ),
+            on_disk_payload=True,
+        )
+    for field_name in payload_indexes:
+        client.create_payload_index(
+            collection_name=collection,
+            field_name=field_name,
+            field_schema=qmodels.PayloadSchemaType.KEYWORD,
+        )
+
+
+def encode_texts(
+    model: SentenceTransformer,
+    texts: Sequence[str],
+    cache: EmbeddingCache | None = None,
+) -> np.ndarray:
+    """Encode ``texts``, running the model only for those missing from ``cache``."""
+    if cache is None:
+        return model.encode(
+            list(texts),
+            batch_size=max(1, len(texts)),
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+    vectors = cache.lookup(texts)
+    missing = [idx for idx, vector in enumerate(vectors) if vector is None]
+    if missing:
+        encoded = model.encode(
+            [texts[idx] for idx in missing],
+            batch_size=len(missing),
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        cache.add([texts[idx] for idx in missing], encoded)
+        for idx, vector in zip(missing, encoded, strict=True):
+            vectors[idx] = vector
+    return np.stack(vectors)
+
+
+def token_lengths(model: SentenceTransformer, texts: Sequence[str]) -> List[int]:
+    encoded = model.tokenizer(
+        list(texts),
+        add_special_tokens=True,
+        truncation=True,
+        max_length=model.max_seq_length,
     )
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def plan_batches(
+    count: int,
+    batch_size: int,
+    lengths: Sequence[int] | None = None,
+    max_batch_tokens: int = 0,
+) -> List[List[int]]:
+    """Group document indices into embedding batches.
+
+    Without a token budget this is plain fixed-size slicing. With one, indices
+    are packed in order of token length so that each batch's padded size
+    (members x longest member) stays within ``max_batch_tokens``; indices inside
+    a batch keep their original order. Only encoding follows this plan;
+    ``embed_and_upsert`` puts the vectors back in document order before upserting.
+    """
+    if lengths is None or max_batch_tokens <= 0:
+        return [
+            list(range(start, min(start + batch_size, count)))
+            for start in range(0, count, batch_size)
+        ]
+    batches: List[List[int]] = []
+    current: List[int] = []
+    longest = 0
+    for idx in sorted(range(count), key=lambda item: (lengths[item], item)):
+        longest_if_added = max(longest, lengths[idx])
+        if current and longest_if_added * (len(current) + 1) > max_batch_tokens:
+            batches.append(sorted(current))
+            current = []
+            longest_if_added = lengths[idx]
+        current.append(idx)
+        longest = longest_if_added
+    if current:
+        batches.append(sorted(current))
+    return batches
 
 
 def embed_and_upsert(
@@ -400,102 +1798,547 @@ def embed_and_upsert(
     collection: str,
     documents: List[CommandDocument],
     batch_size: int,
+    in_flight: int = 0,
+    cache: EmbeddingCache | None = None,
+    max_batch_tokens: int = 0,
+    report: RunReport | None = None,
+    checkpoint: UpsertCheckpoint | None = None,
+    bulk_parallel: int = 0,
 ) -> None:
-    """Embed and upsert in streaming batches to keep memory usage low."""
-    iterator = range(0, len(documents), batch_size)
-    for start in tqdm(iterator, desc="Embedding+Upserting", unit="batch"):
-        batch = documents[start : start + batch_size]
-        embeddings = model.encode(
-            [doc.text for doc in batch],
-            normalize_embeddings=True,
-            show_progress_bar=False,
-        )
+    """Embed and upsert in streaming batches to keep memory usage low.
+
+    ``max_batch_tokens`` switches from fixed ``batch_size`` encode batches to
+    length-bucketed ones under a padded-token budget (see ``plan_batches``),
+    planned over windows of ``BUCKET_WINDOW`` documents. Each window's vectors
+    are reassembled in document order and upserted ``batch_size`` at a time, so
+    points reach Qdrant (and the checkpoint) in input order either way.
+
+    With ``in_flight > 0`` upserts run on a background thread while the next
+    batch is encoded; at most ``in_flight`` upserts are outstanding and they are
+    awaited oldest first, so a failure surfaces for the earliest failing batch.
+
+    With ``bulk_parallel > 0`` every vector is collected, in order, into one
+    float32 matrix that goes to a single ``upload_collection`` call using that
+    many upload processes: no per-point list conversion, and the process pool
+    is started once and only from the main thread. ``in_flight`` is ignored,
+    and the checkpoint records the documents once the call returns.
+
+    ``report`` accumulates tokenization, encoding and upsert times. Each batch
+    is recorded in ``checkpoint`` once Qdrant has acknowledged it, in order.
+    """
+    if bulk_parallel > 0:
+        in_flight = 0
+    executor = ThreadPoolExecutor(max_workers=in_flight) if in_flight > 0 else None
+    pending: Deque[tuple[Future, List[CommandDocument]]] = deque()
+
+    def upload(batch: List[CommandDocument], vectors: np.ndarray) -> None:
+        start = time.perf_counter()
         points = [
             qmodels.PointStruct(
-                id=str(uuid.uuid5(UUID_NAMESPACE, doc.command)),
+                id=doc.point_id(),
                 vector=vector.tolist(),
                 payload=doc.payload(),
             )
-            for doc, vector in zip(batch, embeddings, strict=False)
+            for doc, vector in zip(batch, vectors, strict=False)
         ]
         client.upsert(collection_name=collection, wait=True, points=points)
+        if report is not None:
+            report.add("upsert", time.perf_counter() - start, len(batch))
+
+    def acknowledge(future: Future, batch: List[CommandDocument]) -> None:
+        future.result()
+        if checkpoint is not None:
+            checkpoint.record(batch)
+
+    def send(batch: List[CommandDocument], vectors: np.ndarray) -> None:
+        if executor is None:
+            upload(batch, vectors)
+            if checkpoint is not None:
+                checkpoint.record(batch)
+            return
+        while len(pending) >= in_flight:
+            acknowledge(*pending.popleft())
+        pending.append((executor.submit(upload, batch, vectors), batch))
+
+    def embedded() -> Iterator[tuple[List[CommandDocument], np.ndarray]]:
+        """Documents and their vectors in input order, ``batch_size`` at a time."""
+        lengths = None
+        if max_batch_tokens > 0:
+            start = time.perf_counter()
+            lengths = token_lengths(model, [doc.text for doc in documents])
+            if report is not None:
+                report.add("tokenize", time.perf_counter() - start, len(documents))
+        window_size = BUCKET_WINDOW if lengths is not None else batch_size
+        progress = tqdm(total=len(documents), desc="Embedding+Upserting", unit="doc")
+        for offset in range(0, len(documents), window_size):
+            chunk = documents[offset : offset + window_size]
+            vectors: List[np.ndarray | None] = [None] * len(chunk)
+            chunk_lengths = lengths[offset : offset + window_size] if lengths else None
+            for indices in plan_batches(len(chunk), batch_size, chunk_lengths, max_batch_tokens):
+                start = time.perf_counter()
+                encoded = encode_texts(model, [chunk[idx].text for idx in indices], cache)
+                if report is not None:
+                    report.add("encode", time.perf_counter() - start, len(indices))
+                for idx, vector in zip(indices, encoded, strict=True):
+                    vectors[idx] = vector
+            for start in range(0, len(chunk), batch_size):
+                yield chunk[start : start + batch_size], np.stack(
+                    vectors[start : start + batch_size]
+                )
+            progress.update(len(chunk))
+        progress.close()
+
+    try:
+        if bulk_parallel > 0:
+            matrix: np.ndarray | None = None
+            row = 0
+            for batch, vectors in embedded():
+                if matrix is None:
+                    matrix = np.empty((len(documents), vectors.shape[1]), dtype=np.float32)
+                matrix[row : row + len(batch)] = vectors
+                row += len(batch)
+            if matrix is None:
+                return
+            start = time.perf_counter()
+            client.upload_collection(
+                collection_name=collection,
+                vectors=matrix,
+                ids=[doc.point_id() for doc in documents],
+                payload=[doc.payload() for doc in documents],
+                batch_size=BULK_UPLOAD_BATCH,
+                parallel=bulk_parallel,
+                wait=True,
+            )
+            if report is not None:
+                report.add("bulk_upload", time.perf_counter() - start, len(documents))
+            if checkpoint is not None:
+                checkpoint.record(documents)
+            return
+        for batch, embeddings in embedded():
+            send(batch, embeddings)
+        while pending:
+            acknowledge(*pending.popleft())
+    finally:
+        if executor is not None:
+            for future, _ in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+        if cache is not None:
+            cache.flush()
+
+
+def delete_points(client: QdrantClient, collection: str, point_ids: Sequence[str]) -> None:
+    if not point_ids:
+        return
+    client.delete(
+        collection_name=collection,
+        points_selector=qmodels.PointIdsList(points=list(point_ids)),
+        wait=True,
+    )
+
+
+def vector_storage(args: argparse.Namespace) -> VectorStorage:
+    return VectorStorage(
+        quantization=args.quantization,
+        always_ram=args.quantization_always_ram,
+        quantile=args.quantization_quantile,
+        product_compression=args.product_compression,
+        on_disk=args.on_disk_vectors,
+        hnsw_m=args.hnsw_m,
+        hnsw_ef_construct=args.hnsw_ef_construct,
+    )
+
+
+def export_vector_store(
+    client: QdrantClient, collection: str, directory: Path, model: str
+) -> int:
+    """Dump every point of ``collection`` into a vector store directory."""
+    ids: List[str] = []
+    vectors: List[List[float]] = []
+    payloads: List[Dict[str, object]] = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            limit=1024,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        for point in points:
+            ids.append(str(point.id))
+            vectors.append(point.vector)
+            payloads.append(point.payload or {})
+        if offset is None:
+            break
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    write_store(directory, model, ids, matrix, payloads)
+    return len(ids)
+
+
+def qdrant_http(args: argparse.Namespace, timeout: float | None = None) -> httpx.Client:
+    """Plain HTTP client for the snapshot transfer endpoints the SDK lacks."""
+    base_url = args.qdrant_url or f"http://{args.qdrant_host}:{args.qdrant_port}"
+    headers = {"api-key": args.qdrant_api_key} if args.qdrant_api_key else {}
+    return httpx.Client(base_url=base_url, headers=headers, timeout=timeout)
+
+
+def snapshot_collection(args: argparse.Namespace) -> None:
+    """Snapshot the collection of the last completed run and download it.
+
+    Next to ``<name>.snapshot`` goes ``<name>.snapshot.json`` with the model,
+    vector size, point count, file hash and the run's manifest, which
+    ``restore`` checks before and after loading the snapshot.
+    """
+    model = model_tag(MODEL_NAME, args.embedding_dim)
+    manifest = IngestManifest.load(args.manifest)
+    if (
+        manifest.collection != args.collection
+        or manifest.model != model
+        or args.manifest.with_suffix(".checkpoint.jsonl").exists()
+    ):
+        raise SystemExit(
+            f"No completed ingest run of '{args.collection}' with {model} in "
+            f"{args.manifest}; run ingest first."
+        )
+    client = build_qdrant_client(args)
+    info = client.get_collection(args.collection)
+    print(f"Creating snapshot of '{args.collection}' ({info.points_count} points) ...")
+    description = client.create_snapshot(collection_name=args.collection, wait=True)
+    args.output.mkdir(parents=True, exist_ok=True)
+    target = args.output / description.name
+    digest = hashlib.sha256()
+    with qdrant_http(args) as http, http.stream(
+        "GET", f"/collections/{args.collection}/snapshots/{description.name}"
+    ) as response:
+        response.raise_for_status()
+        with target.open("wb") as handle:
+            for chunk in response.iter_bytes(1 << 20):
+                handle.write(chunk)
+                digest.update(chunk)
+    client.delete_snapshot(collection_name=args.collection, snapshot_name=description.name)
+    metadata = {
+        "collection": args.collection,
+        "model": model,
+        "dim": collection_dim(info),
+        "points": info.points_count,
+        "split": manifest.split,
+        "sha256": digest.hexdigest(),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "manifest": {
+            "files": manifest.files,
+            "documents": manifest.documents,
+        },
+    }
+    target.with_name(target.name + ".json").write_text(json.dumps(metadata), encoding="utf-8")
+    print(f"Snapshot written to {target}.")
+
+
+def restore_collection(args: argparse.Namespace) -> None:
+    """Load a snapshot into Qdrant after checking it was built with this model."""
+    remote = args.snapshot.startswith(("http://", "https://"))
+    if remote:
+        response = httpx.get(args.snapshot + ".json", timeout=args.timeout)
+        response.raise_for_status()
+        metadata = response.json()
+    else:
+        snapshot_path = Path(args.snapshot).resolve()
+        metadata = json.loads(
+            snapshot_path.with_name(snapshot_path.name + ".json").read_text(encoding="utf-8")
+        )
+    model = model_tag(MODEL_NAME, args.embedding_dim)
+    if metadata.get("model") != model:
+        raise SystemExit(
+            f"Snapshot was embedded with {metadata.get('model')!r}, "
+            f"this ingest uses {model!r}."
+        )
+    client = build_qdrant_client(args)
+    if collection_exists(client, args.collection):
+        existing_dim = collection_dim(client.get_collection(args.collection))
+        if existing_dim != metadata["dim"]:
+            raise SystemExit(
+                f"Collection '{args.collection}' has vector size {existing_dim}, "
+                f"snapshot has {metadata['dim']}."
+            )
+        if not args.force:
+            raise SystemExit(f"Collection '{args.collection}' exists; pass --force to replace it.")
+
+    print(f"Restoring {metadata['points']} points into '{args.collection}' ...")
+    if remote:
+        client.recover_snapshot(
+            collection_name=args.collection,
+            location=args.snapshot,
+            priority=qmodels.SnapshotPriority.SNAPSHOT,
+            wait=True,
+        )
+    else:
+        if file_digest(snapshot_path) != metadata["sha256"]:
+            raise SystemExit(f"{snapshot_path} does not match the hash in its metadata.")
+        with qdrant_http(args) as http, snapshot_path.open("rb") as handle:
+            response = http.post(
+                f"/collections/{args.collection}/snapshots/upload",
+                params={"wait": "true", "priority": "snapshot"},
+                files={"snapshot": (snapshot_path.name, handle)},
+            )
+            response.raise_for_status()
+
+    info = client.get_collection(args.collection)
+    if collection_dim(info) != metadata["dim"] or info.points_count != metadata["points"]:
+        raise SystemExit(
+            f"Restored '{args.collection}' has {info.points_count} points of size "
+            f"{collection_dim(info)}; snapshot metadata says {metadata['points']} of size "
+            f"{metadata['dim']}."
+        )
+    IngestManifest(
+        collection=args.collection,
+        model=model,
+        split=metadata["split"],
+        files=metadata["manifest"]["files"],
+        documents=metadata["manifest"]["documents"],
+    ).save(args.manifest)
+    print(f"Restored '{args.collection}'; manifest written to {args.manifest}.")
 
 
 def build_qdrant_client(args: argparse.Namespace) -> QdrantClient:
+    transport = {"prefer_grpc": args.prefer_grpc, "grpc_port": args.qdrant_grpc_port}
     if args.qdrant_url:
         return QdrantClient(
             url=args.qdrant_url,
             api_key=args.qdrant_api_key,
             timeout=args.timeout,
+            **transport,
         )
     return QdrantClient(
         host=args.qdrant_host,
         port=args.qdrant_port,
         api_key=args.qdrant_api_key,
         timeout=args.timeout,
+        **transport,
     )
 
 
 def main() -> None:
     args = parse_args()
-    ensure_paths(args.man_root, args.tldr_root)
+    if args.action == "snapshot":
+        snapshot_collection(args)
+        return
+    if args.action == "restore":
+        restore_collection(args)
+        return
+    ensure_paths(args.deb_root if args.source == "debs" else args.man_root, args.tldr_root)
+    report = RunReport(trace_memory=args.trace_memory)
 
-    man_index: Dict[str, Dict[str, ManRecord]] = defaultdict(dict)
-    print(f"Scanning man pages under {args.man_root} ...")
-    man_file_count = 0
-    for file_path in tqdm(discover_man_files(args.man_root), desc="Parsing man pages", unit="file"):
-        man_file_count += 1
-        language = detect_language(file_path, args.man_root)
-        command = command_from_path(file_path)
-        if not command:
-            continue
-        text = read_man_file(file_path)
-        sections = extract_sections(text)
-        if not sections:
-            sections = {"DESCRIPTION": strip_formatting(text)}
-        record = man_index[command].get(language)
-        rel_path = str(file_path.relative_to(REPO_ROOT))
-        if record:
-            merged = merge_sections(record.sections, sections)
-            if score_sections(merged) >= score_sections(record.sections):
-                man_index[command][language] = ManRecord(language, merged, rel_path)
-        else:
-            man_index[command][language] = ManRecord(language, sections, rel_path)
+    client = build_qdrant_client(args)
+    model_name = model_tag(MODEL_NAME, args.embedding_dim)
+    manifest = IngestManifest() if args.full else IngestManifest.load(args.manifest)
+    collection_present = collection_exists(client, args.collection)
+    if (
+        manifest.collection != args.collection
+        or manifest.model != model_name
+        or not collection_present
+    ):
+        manifest = IngestManifest()
+    # Changing the split rebuilds every command; old-layout points then show up as stale.
+    layout = args.split if args.split != "section" else f"section:{args.chunk_chars}"
+    rebuild_all = manifest.split != layout
+    checkpoint = UpsertCheckpoint(
+        args.manifest.with_suffix(".checkpoint.jsonl"),
+        {"collection": args.collection, "model": model_name, "split": layout},
+    )
+    acked = checkpoint.load() if args.resume and collection_present else {}
 
-    print(f"Indexed {len(man_index)} unique commands from {man_file_count} man files.")
+    with report.stage("scan") as stage:
+        if args.source == "debs":
+            print(f"Scanning .deb packages under {args.deb_root} ...")
+            sources = sorted(discover_debs(args.deb_root))
+            file_table, changed_paths, changed_commands = scan_source_changes(sources, manifest)
+        else:
+            print(f"Scanning man pages under {args.man_root} ...")
+            sources = sorted(discover_man_files(args.man_root))
+            file_table, changed_paths, changed_commands = scan_source_changes(
+                sources, manifest, lambda path: [command_from_path(path)]
+            )
+        stage["items"] = len(sources)
+    if args.source != "debs":
+        with report.stage("resolve_aliases") as stage:
+            alias_paths = resolve_man_aliases(sources, args.man_root, file_table)
+            for rel in set(file_table) | set(manifest.files):
+                previous = manifest.files.get(rel, {}).get("alias_of")
+                target = alias_paths.get(rel)
+                if rel in file_table:
+                    entry = {
+                        key: value for key, value in file_table[rel].items() if key != "alias_of"
+                    }
+                    if target is not None:
+                        entry["alias_of"] = target
+                    file_table[rel] = entry
+                if previous == target:
+                    continue
+                for other in (rel, previous, target):
+                    known = file_table.get(other) or manifest.files.get(other) or {}
+                    changed_commands.update(known.get("commands", []))
+            stage["items"] = len(alias_paths)
+        print(f"Resolved {len(alias_paths)} man files as links, copies or .so includes.")
 
     print(f"Loading TLDR corpus from {args.tldr_root} ...")
-    tldr_index = load_tldr_corpus(args.tldr_root)
-    tldr_entry_count = sum(len(entries) for entries in tldr_index.values())
+    with report.stage("load_tldr") as stage:
+        tldr_index = load_tldr_corpus(args.tldr_root)
+        tldr_entry_count = sum(len(entries) for entries in tldr_index.values())
+        tldr_hashes = {command: tldr_digest(entries) for command, entries in tldr_index.items()}
+        stage["items"] = tldr_entry_count
     print(f"Loaded {tldr_entry_count} TLDR entries covering {len(tldr_index)} commands.")
 
-    documents = build_documents(man_index, tldr_index)
-    if not documents:
-        print("No documents to ingest. Exiting.")
-        return
-    print(f"Prepared {len(documents)} merged command documents.")
-
-    print(f"Loading embedding model '{MODEL_NAME}' on device {args.device} ...")
-    config_kwargs = (
-        {"use_memory_efficient_attention": False, "attn_implementation": "sdpa"}
-        if args.device == "cpu"
-        else None
-    )
-    model = SentenceTransformer(
-        MODEL_NAME,
-        device=args.device,
-        trust_remote_code=True,
-        config_kwargs=config_kwargs,
+    known_commands = {
+        str(command)
+        for entry in file_table.values()
+        if "alias_of" not in entry
+        for command in entry["commands"]
+    } | set(tldr_index)
+    known_commands.discard("")
+    for command in known_commands | set(manifest.documents):
+        previous = manifest.documents.get(command)
+        if (
+            rebuild_all
+            or previous is None
+            or previous.get("tldr", "") != tldr_hashes.get(command, "")
+        ):
+            changed_commands.add(command)
+
+    with report.stage("parse") as stage:
+        if args.source == "debs":
+            man_index = load_deb_index(
+                sources, file_table, manifest, changed_paths, changed_commands, args.workers
+            )
+        else:
+            to_parse = [
+                path
+                for path in sources
+                if file_table[str(path.relative_to(REPO_ROOT))]["commands"][0] in changed_commands
+                and "alias_of" not in file_table[str(path.relative_to(REPO_ROOT))]
+            ]
+            man_index = parse_man_pages(to_parse, args.man_root, args.workers, report)
+        stage["items"] = sum(len(records) for records in man_index.values())
+    known_commands |= changed_commands
+    print(
+        f"{len(changed_commands)} of {len(known_commands)} commands changed since the last run; "
+        f"re-indexed {len(man_index)} of them from man pages."
     )
-    vector_dim = model.get_sentence_embedding_dimension()
-
-    client = build_qdrant_client(args)
-    ensure_collection(client, args.collection, vector_dim)
-
-    embed_and_upsert(model, client, args.collection, documents, args.batch_size)
-
-    print(f"Ingestion complete. {len(documents)} documents upserted into '{args.collection}'.")
 
+    with report.stage("build_documents") as stage:
+        build = DOCUMENT_BUILDERS[args.split]
+        if args.split == "section":
+            build = functools.partial(build_section_documents, max_chars=args.chunk_chars)
+        documents = build(
+            man_index,
+            {command: tldr_index[command] for command in changed_commands if command in tldr_index},
+        )
+        aliases = command_aliases(file_table)
+        for doc in documents:
+            doc.aliases = aliases.get(doc.command, [])
+        stage["items"] = len(documents)
+    print(f"Prepared {len(documents)} documents (one per {args.split}).")
+
+    with report.stage("diff_manifest") as stage:
+        documents_state = {
+            command: state
+            for command, state in manifest.documents.items()
+            if command not in changed_commands
+        }
+        pending: List[CommandDocument] = []
+        for doc in documents:
+            content_hash = doc.content_hash()
+            previous_points = manifest.documents.get(doc.command, {}).get("points", {})
+            if previous_points.get(doc.point_id()) != content_hash:
+                pending.append(doc)
+            documents_state.setdefault(
+                doc.command,
+                {"tldr": tldr_hashes.get(doc.command, ""), "points": {}},
+            )["points"][doc.point_id()] = content_hash
+
+        stale_ids = sorted(
+            point_id
+            for command in changed_commands
+            for point_id in manifest.documents.get(command, {}).get("points", {})
+            if point_id not in documents_state.get(command, {}).get("points", {})
+        )
+        resumed = [doc for doc in pending if acked.get(doc.point_id()) == doc.content_hash()]
+        if resumed:
+            pending = [doc for doc in pending if acked.get(doc.point_id()) != doc.content_hash()]
+        stage["items"] = len(pending)
+    if resumed:
+        print(f"Resuming: {len(resumed)} documents were already upserted by the interrupted run.")
+    print(f"{len(pending)} documents to embed, {len(stale_ids)} stale points to delete.")
+
+    if pending:
+        print(
+            f"Loading embedding model '{model_name}' ({args.embedding_backend} backend) "
+            f"on device {args.device} ..."
+        )
+        with report.stage("load_model"):
+            model = load_embedder(
+                MODEL_NAME,
+                device=args.device,
+                backend=args.embedding_backend,
+                truncate_dim=args.embedding_dim,
+            )
+            vector_dim = model.get_sentence_embedding_dimension()
+            ensure_collection(
+                client,
+                args.collection,
+                vector_dim,
+                PAYLOAD_INDEXES[args.split],
+                vector_storage(args),
+            )
+        checkpoint.start({doc.point_id(): doc.content_hash() for doc in resumed})
+        with report.stage("embed_and_upsert") as stage:
+            embed_and_upsert(
+                model,
+                client,
+                args.collection,
+                pending,
+                args.batch_size,
+                in_flight=args.upsert_in_flight,
+                cache=None
+                if args.no_embedding_cache
+                else EmbeddingCache(
+                    args.embedding_cache,
+                    backend_tag(MODEL_NAME, args.embedding_backend, args.embedding_dim),
+                    normalize=True,
+                ),
+                max_batch_tokens=args.max_batch_tokens,
+                report=report,
+                checkpoint=checkpoint,
+                bulk_parallel=args.bulk_upload,
+            )
+            stage["items"] = len(pending)
+        checkpoint.close()
+
+    with report.stage("delete_points") as stage:
+        delete_points(client, args.collection, stale_ids)
+        stage["items"] = len(stale_ids)
+
+    manifest.collection = args.collection
+    manifest.model = model_name
+    manifest.split = layout
+    manifest.files = file_table
+    manifest.documents = documents_state
+    manifest.save(args.manifest)
+    checkpoint.discard()
+
+    print(
+        f"Ingestion complete. {len(pending)} documents upserted and {len(stale_ids)} "
+        f"points deleted in '{args.collection}'."
+    )
+    if args.export_vectors is not None:
+        with report.stage("export_vectors") as stage:
+            stage["items"] = export_vector_store(
+                client, args.collection, args.export_vectors, model_name
+            )
+        print(f"Exported {int(stage['items'])} vectors to {args.export_vectors}.")
+    for line in report.summary():
+        print(line)
+    report.save(args.report)
+    print(f"Run report written to {args.report}.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,113 @@
+"""Shared fixtures: a tiny man/TLDR corpus, a hashing stand-in model, in-memory Qdrant."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Callable, Sequence
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+
+from app.api.linuxmancyclopedia import ingest  # noqa: E402
+from app.api.linuxmancyclopedia.benchmarks.ingest_bench import HashingEmbedder  # noqa: E402
+
+MAN_PAGES = {
+    "ls": "list directory contents",
+    "tar": "an archiving utility",
+    "grep": "print lines that match patterns",
+}
+TLDR_PAGES = {"ls": "List directory contents.", "tar": "Archiving utility."}
+
+
+def man_page(command: str, summary: str) -> str:
+    return (
+        f'.TH {command.upper()} "1" "2024" "test" "User Commands"\n'
+        ".SH NAME\n"
+        f"{command} \\- {summary}\n"
+        ".SH SYNOPSIS\n"
+        f".B {command}\n"
+        "[\\fIOPTION\\fR]... [\\fIFILE\\fR]...\n"
+        ".SH DESCRIPTION\n"
+        f"The {command} command is used to {summary}.\n"
+        ".SH OPTIONS\n"
+        ".TP\n"
+        "\\fB\\-v\\fR\n"
+        "be verbose\n"
+    )
+
+
+def tldr_page(command: str, summary: str) -> str:
+    return f"# {command}\n\n> {summary}\n\n- Run it:\n\n`{command} {{{{path}}}}`\n"
+
+
+class CountingEmbedder(HashingEmbedder):
+    """The benchmark's hashing stand-in model, counting the texts it encodes."""
+
+    def __init__(self) -> None:
+        super().__init__(dim=16)
+        self.encoded = 0
+
+    def encode(self, texts: Sequence[str], **kwargs: object) -> np.ndarray:
+        self.encoded += len(texts)
+        return super().encode(texts, **kwargs)
+
+
+@pytest.fixture
+def corpus(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Write the man/TLDR corpus under ``tmp_path``, which stands in for the repo root."""
+    monkeypatch.setattr(ingest, "REPO_ROOT", tmp_path)
+    for command, summary in MAN_PAGES.items():
+        path = tmp_path / "man" / "man1" / f"{command}.1"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(man_page(command, summary), encoding="utf-8")
+    for command, summary in TLDR_PAGES.items():
+        path = tmp_path / "tldr" / "pages" / "common" / f"{command}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(tldr_page(command, summary), encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def model() -> CountingEmbedder:
+    return CountingEmbedder()
+
+
+@pytest.fixture
+def client() -> QdrantClient:
+    return QdrantClient(":memory:")
+
+
+@pytest.fixture
+def run_ingest(
+    corpus: Path, model: CountingEmbedder, client: QdrantClient, monkeypatch: pytest.MonkeyPatch
+) -> Callable[..., int]:
+    """Run ``ingest.main`` on the corpus; returns how many texts it encoded."""
+    monkeypatch.setattr(ingest, "load_embedder", lambda *args, **kwargs: model)
+    monkeypatch.setattr(ingest, "build_qdrant_client", lambda args: client)
+
+    def run(*extra: str) -> int:
+        argv = [
+            "ingest",
+            "--source", "extracted",
+            "--split", "command",
+            "--man-root", str(corpus / "man"),
+            "--tldr-root", str(corpus / "tldr"),
+            "--collection", "commands",
+            "--manifest", str(corpus / "manifest.json"),
+            "--embedding-cache", str(corpus / "cache"),
+            "--report", str(corpus / "report.json"),
+            "--batch-size", "1",
+            # QdrantClient(":memory:") is not thread-safe: no background upserts.
+            "--upsert-in-flight", "0",
+            *extra,
+        ]
+        monkeypatch.setattr(sys, "argv", argv)
+        before = model.encoded
+        ingest.main()
+        return model.encoded - before
+
+    return run
@@ -0,0 +1,34 @@
+"""_base_commands names the programs a shell line runs, as ingest keys them."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.api.linuxmancyclopedia.example_route import _base_commands
+
+
+@pytest.mark.parametrize(
+    ("line", "expected"),
+    [
+        ("tar -xzf foo.tgz", ["tar"]),
+        ("Grep -r TODO src/", ["grep"]),
+        ("/usr/bin/ls -la", ["ls"]),
+        ("ls -la | grep x && wc -l < f", ["ls", "grep", "wc"]),
+        ("cat a; cat b", ["cat"]),
+        ("LANG=C sort -u file > out", ["sort"]),
+        ("(cd /tmp && make)", ["cd", "make"]),
+        ("sudo -u root ls -la", ["sudo", "ls"]),
+        ("sudo --user root -g wheel systemctl restart nginx", ["sudo", "systemctl"]),
+        ("sudo --user=root -uroot ls", ["sudo", "ls"]),
+        ("sudo -E -- ls", ["sudo", "ls"]),
+        ("ls | sudo -n tee out", ["ls", "sudo", "tee"]),
+        ("time nice -n 5 gzip f", ["time", "nice", "gzip"]),
+        ("nice -5 tar -cf a.tar dir", ["nice", "tar"]),
+        ("env -u HOME FOO=1 make", ["env", "make"]),
+        ("doas -u admin vi /etc/hosts", ["doas", "vi"]),
+        ("nohup ./server.sh &", ["nohup", "server.sh"]),
+        ("echo 'unbalanced", []),
+    ],
+)
+def test_base_commands(line, expected):
+    assert _base_commands(line) == expected
@@ -0,0 +1,91 @@
+"""Upsert checkpoints let an interrupted ingest resume without re-embedding."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.api.linuxmancyclopedia.ingest import CommandDocument, UpsertCheckpoint
+
+RUN = {"collection": "commands", "model": "model", "split": "command"}
+
+
+def document(command: str, text: str = "text") -> CommandDocument:
+    return CommandDocument(
+        command=command, text=text, languages=["en"], sections=[], tldr_languages=[], sources=[]
+    )
+
+
+def test_recorded_batches_are_loaded_back(tmp_path):
+    checkpoint = UpsertCheckpoint(tmp_path / "run.checkpoint.jsonl", RUN)
+    checkpoint.start({})
+    checkpoint.record([document("ls"), document("tar")])
+    checkpoint.record([document("grep")])
+    checkpoint.close()
+
+    acked = UpsertCheckpoint(tmp_path / "run.checkpoint.jsonl", RUN).load()
+    expected = [document("ls"), document("tar"), document("grep")]
+    assert acked == {doc.point_id(): doc.content_hash() for doc in expected}
+
+
+def test_checkpoint_of_another_run_is_ignored(tmp_path):
+    checkpoint = UpsertCheckpoint(tmp_path / "run.checkpoint.jsonl", RUN)
+    checkpoint.start({})
+    checkpoint.record([document("ls")])
+    checkpoint.close()
+
+    other = UpsertCheckpoint(tmp_path / "run.checkpoint.jsonl", {**RUN, "model": "other"})
+    assert other.load() == {}
+
+
+def test_torn_final_line_is_skipped(tmp_path):
+    path = tmp_path / "run.checkpoint.jsonl"
+    checkpoint = UpsertCheckpoint(path, RUN)
+    checkpoint.start({})
+    checkpoint.record([document("ls")])
+    checkpoint.close()
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps({document("tar").point_id(): "hash"})[:20])
+
+    assert list(UpsertCheckpoint(path, RUN).load()) == [document("ls").point_id()]
+
+
+def test_interrupted_run_resumes_where_it_stopped(run_ingest, model, client, corpus, monkeypatch):
+    encode = model.encode
+
+    def fail_on_third(texts, **kwargs):
+        if model.encoded + len(texts) > 2:
+            raise MemoryError("simulated OOM")
+        return encode(texts, **kwargs)
+
+    monkeypatch.setattr(model, "encode", fail_on_third)
+    with pytest.raises(MemoryError):
+        run_ingest("--no-embedding-cache")
+    checkpoint_path = corpus / "manifest.checkpoint.jsonl"
+    batches = checkpoint_path.read_text(encoding="utf-8").splitlines()[1:]
+    assert sum(len(json.loads(batch)) for batch in batches) == 2
+    assert not (corpus / "manifest.json").exists()
+
+    monkeypatch.setattr(model, "encode", encode)
+    assert run_ingest("--no-embedding-cache", "--resume") == 1
+    assert client.count("commands").count == 3
+    assert not checkpoint_path.exists()
+
+
+def test_changed_document_is_not_skipped_on_resume(run_ingest, model, corpus, monkeypatch):
+    encode = model.encode
+
+    def fail_on_second(texts, **kwargs):
+        if model.encoded + len(texts) > 1:
+            raise MemoryError("simulated OOM")
+        return encode(texts, **kwargs)
+
+    monkeypatch.setattr(model, "encode", fail_on_second)
+    with pytest.raises(MemoryError):
+        run_ingest("--no-embedding-cache")
+    for page in (corpus / "man" / "man1").iterdir():
+        page.write_text(page.read_text(encoding="utf-8") + "edited\n", encoding="utf-8")
+
+    monkeypatch.setattr(model, "encode", encode)
+    assert run_ingest("--no-embedding-cache", "--resume") == 3
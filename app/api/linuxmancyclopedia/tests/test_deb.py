@@ -0,0 +1,126 @@
+"""Reading man pages straight out of .deb archives: ar framing, tar links, aliases."""
+
+from __future__ import annotations
+
+import gzip
+import io
+import tarfile
+from pathlib import Path, PurePosixPath
+from typing import Dict, List
+
+import pytest
+from conftest import man_page
+
+from app.api.linuxmancyclopedia import ingest
+from app.api.linuxmancyclopedia.ingest import iter_deb_man_pages, parse_deb, read_ar_members
+
+FOO_PAGE = gzip.compress(man_page("foo", "frobnicate files").encode("utf-8"))
+
+
+def ar_archive(members: Dict[str, bytes]) -> bytes:
+    out = io.BytesIO()
+    out.write(ingest.AR_MAGIC)
+    for name, data in members.items():
+        header = (
+            f"{name + '/':<16}{0:<12}{0:<6}{0:<6}{100644:<8}{len(data):<10}".encode("ascii")
+            + b"`\n"
+        )
+        assert len(header) == 60
+        out.write(header + data)
+        if len(data) % 2:
+            out.write(b"\n")
+    return out.getvalue()
+
+
+def tar_archive(entries: List[tarfile.TarInfo], contents: Dict[str, bytes]) -> bytes:
+    out = io.BytesIO()
+    with tarfile.open(fileobj=out, mode="w:gz") as tar:
+        for info in entries:
+            data = contents.get(info.name)
+            if data is not None:
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+            else:
+                tar.addfile(info)
+    return out.getvalue()
+
+
+def entry(name: str, kind: bytes = tarfile.REGTYPE, linkname: str = "") -> tarfile.TarInfo:
+    info = tarfile.TarInfo(name)
+    info.type = kind
+    info.linkname = linkname
+    return info
+
+
+@pytest.fixture
+def deb(tmp_path: Path) -> Path:
+    man1 = "./usr/share/man/man1"
+    data = tar_archive(
+        [
+            entry("./usr/share/man/man1", tarfile.DIRTYPE),
+            entry(f"{man1}/foo.1.gz"),
+            entry(f"{man1}/bar.1.gz", tarfile.SYMTYPE, "foo.1.gz"),
+            entry(f"{man1}/baz.1.gz", tarfile.LNKTYPE, f"{man1}/foo.1.gz"),
+            entry(f"{man1}/qux.1.gz", tarfile.SYMTYPE, "bar.1.gz"),
+            entry(f"{man1}/gone.1.gz", tarfile.SYMTYPE, "missing.1.gz"),
+            entry("./usr/share/man/man8/foo-stub.8"),
+            entry("./usr/share/doc/foo/README"),
+        ],
+        {
+            f"{man1}/foo.1.gz": FOO_PAGE,
+            "./usr/share/man/man8/foo-stub.8": b".so man1/foo.1\n",
+            "./usr/share/doc/foo/README": b"not a man page\n",
+        },
+    )
+    path = tmp_path / "foo_1.0_all.deb"
+    path.write_bytes(
+        ar_archive({"debian-binary": b"2.0\n", "control.tar.gz": b"odd", "data.tar.gz": data})
+    )
+    return path
+
+
+def test_ar_members_skip_odd_size_padding(deb: Path):
+    with deb.open("rb") as handle:
+        members = [(name, reader.read()) for name, reader in read_ar_members(handle)]
+
+    assert [name for name, _ in members] == ["debian-binary", "control.tar.gz", "data.tar.gz"]
+    assert members[1][1] == b"odd"
+    assert members[2][1][:2] == b"\x1f\x8b"
+
+
+def test_unread_members_are_skipped(deb: Path):
+    with deb.open("rb") as handle:
+        names = [name for name, _ in read_ar_members(handle)]
+
+    assert names == ["debian-binary", "control.tar.gz", "data.tar.gz"]
+
+
+def test_not_an_ar_archive(tmp_path: Path):
+    path = tmp_path / "broken.deb"
+    path.write_bytes(b"PK\x03\x04")
+
+    with path.open("rb") as handle, pytest.raises(ValueError):
+        next(read_ar_members(handle))
+
+
+def test_links_resolve_to_files_in_the_package(deb: Path):
+    pages = list(iter_deb_man_pages(deb))
+
+    assert pages == [
+        (PurePosixPath("man1/foo.1.gz"), FOO_PAGE, None),
+        (PurePosixPath("man8/foo-stub.8"), b".so man1/foo.1\n", None),
+        (PurePosixPath("man1/bar.1.gz"), b"", PurePosixPath("man1/foo.1.gz")),
+        (PurePosixPath("man1/baz.1.gz"), b"", PurePosixPath("man1/foo.1.gz")),
+        (PurePosixPath("man1/qux.1.gz"), b"", PurePosixPath("man1/foo.1.gz")),
+    ]
+
+
+def test_parse_deb_parses_each_real_page_once(deb: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(ingest, "REPO_ROOT", deb.parent)
+
+    parsed, aliases = parse_deb(deb)
+
+    assert [(command, language) for command, language, _, _ in parsed] == [("foo", "en")]
+    assert parsed[0][3] == "foo_1.0_all.deb:usr/share/man/man1/foo.1.gz"
+    assert "frobnicate files" in parsed[0][2]["NAME"]
+    assert aliases == {"bar": "foo", "baz": "foo", "qux": "foo", "foo-stub": "foo"}
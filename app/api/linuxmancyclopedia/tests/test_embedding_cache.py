@@ -0,0 +1,67 @@
+"""EmbeddingCache keeps index rows aligned with the vector file."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from app.api.linuxmancyclopedia.ingest import EmbeddingCache
+
+
+def vectors(count: int, dim: int = 4, start: float = 0.0) -> np.ndarray:
+    return np.arange(start, start + count * dim, dtype=np.float32).reshape(count, dim)
+
+
+def test_round_trip_after_flush(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model", normalize=True)
+    cache.add(["a", "b"], vectors(2))
+    cache.flush()
+
+    reloaded = EmbeddingCache(tmp_path, "model", normalize=True)
+    found = reloaded.lookup(["b", "missing", "a"])
+    np.testing.assert_array_equal(found[0], vectors(2)[1])
+    assert found[1] is None
+    np.testing.assert_array_equal(found[2], vectors(2)[0])
+
+
+def test_settings_get_separate_namespaces(tmp_path):
+    EmbeddingCache(tmp_path, "model", normalize=True).add(["a"], vectors(1))
+    other = EmbeddingCache(tmp_path, "model", normalize=False)
+    assert other.lookup(["a"]) == [None]
+
+
+def test_partial_row_is_truncated_before_the_next_append(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model", normalize=True)
+    cache.add(["a"], vectors(1))
+    cache.flush()
+    with cache.vectors_path.open("ab") as handle:
+        handle.write(b"\x00" * 6)  # torn write of the next row
+
+    cache = EmbeddingCache(tmp_path, "model", normalize=True)
+    cache.add(["b"], vectors(1, start=100.0))
+    assert cache.vectors_path.stat().st_size == 2 * 4 * 4
+    np.testing.assert_array_equal(cache.lookup(["b"])[0], vectors(1, start=100.0)[0])
+    np.testing.assert_array_equal(cache.lookup(["a"])[0], vectors(1)[0])
+
+
+def test_index_entries_past_the_last_whole_row_are_dropped(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model", normalize=True)
+    cache.add(["a", "b", "c"], vectors(3))
+    cache.flush()
+    with cache.vectors_path.open("r+b") as handle:
+        handle.truncate(1 * 4 * 4 + 5)  # rows b and c were lost
+
+    reloaded = EmbeddingCache(tmp_path, "model", normalize=True)
+    assert set(reloaded.rows.values()) == {0}
+    reloaded.add(["d"], vectors(1, start=50.0))
+    np.testing.assert_array_equal(reloaded.lookup(["d"])[0], vectors(1, start=50.0)[0])
+    assert reloaded.lookup(["b", "c"]) == [None, None]
+
+
+def test_dimension_change_starts_a_new_file(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model", normalize=True)
+    cache.add(["a"], vectors(1, dim=4))
+    cache.add(["b"], vectors(1, dim=8))
+
+    assert cache.lookup(["a"]) == [None]
+    np.testing.assert_array_equal(cache.lookup(["b"])[0], vectors(1, dim=8)[0])
+    assert cache.vectors_path.stat().st_size == 8 * 4
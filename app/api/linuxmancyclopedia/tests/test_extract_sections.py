@@ -0,0 +1,56 @@
+"""The single-pass roff renderer agrees with the per-line regex extractor."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.api.linuxmancyclopedia import ingest
+
+FIXTURE_MANIFEST = (
+    Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "man_pages.json"
+)
+FIXTURE_PAGES = [
+    page["path"]
+    for page in json.loads(FIXTURE_MANIFEST.read_text(encoding="utf-8"))["pages"]
+]
+
+SAMPLE = (
+    '.TH TAR "1" "2024" "tar" "User Commands"\n'
+    ".SH NAME\n"
+    "tar \\- an archiving utility\n"
+    ".SH SYNOPSIS\n"
+    ".B tar\n"
+    "[\\fIOPTION\\fR...] [\\fIFILE\\fR]...\n"
+    ".SH DESCRIPTION\n"
+    ".PP\n"
+    "\\fBtar\\fR saves many files together into a single archive.\n"
+    ".SH OPTIONS\n"
+    ".TP\n"
+    "\\fB\\-x\\fR, \\fB\\-\\-extract\\fR\n"
+    "Extract files from an archive.\n"
+    ".SH \"SEE ALSO\"\n"
+    "gzip(1)\n"
+)
+
+
+def test_sample_page_sections():
+    sections = ingest.extract_sections(SAMPLE)
+
+    assert sections == ingest.extract_sections_regex(SAMPLE)
+    assert sections["NAME"] == "tar - an archiving utility"
+    assert "saves many files together" in sections["DESCRIPTION"]
+    assert "-x, --extract" in sections["OPTIONS"]
+    assert "\\f" not in "".join(sections.values())
+
+
+@pytest.mark.parametrize("rel_path", FIXTURE_PAGES)
+def test_fixture_pages_match_the_regex_extractor(rel_path):
+    path = ingest.DEFAULT_MAN_ROOT / rel_path
+    if not path.is_file():
+        pytest.skip(f"{rel_path} is not in the man page dump")
+    text = ingest.read_man_file(path)
+
+    assert ingest.extract_sections(text) == ingest.extract_sections_regex(text)
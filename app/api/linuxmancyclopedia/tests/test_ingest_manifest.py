@@ -0,0 +1,91 @@
+"""Incremental ingest: reruns only re-embed what changed since the manifest."""
+
+from __future__ import annotations
+
+import json
+import os
+
+from conftest import man_page
+
+from app.api.linuxmancyclopedia import ingest
+
+
+def indexed_commands(client) -> set[str]:
+    points, _ = client.scroll("commands", limit=100, with_payload=["command"])
+    return {point.payload["command"] for point in points}
+
+
+def test_rerun_without_changes_embeds_nothing(run_ingest, client, corpus):
+    assert run_ingest("--no-embedding-cache") == 3
+    manifest = (corpus / "manifest.json").read_text(encoding="utf-8")
+
+    assert run_ingest("--no-embedding-cache") == 0
+    assert (corpus / "manifest.json").read_text(encoding="utf-8") == manifest
+    assert indexed_commands(client) == {"ls", "tar", "grep"}
+
+
+def test_touched_but_identical_file_is_not_a_change(run_ingest, corpus):
+    run_ingest("--no-embedding-cache")
+    path = corpus / "man" / "man1" / "tar.1"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert run_ingest("--no-embedding-cache") == 0
+    files = json.loads((corpus / "manifest.json").read_text(encoding="utf-8"))["files"]
+    assert files["man/man1/tar.1"]["mtime_ns"] == path.stat().st_mtime_ns
+
+
+def test_edited_page_re_embeds_only_its_command(run_ingest, client, corpus):
+    run_ingest("--no-embedding-cache")
+    (corpus / "man" / "man1" / "tar.1").write_text(
+        man_page("tar", "store and extract files from an archive"), encoding="utf-8"
+    )
+
+    assert run_ingest("--no-embedding-cache") == 1
+    points, _ = client.scroll("commands", limit=100, with_payload=True)
+    tar = next(point for point in points if point.payload["command"] == "tar")
+    assert "store and extract files" in tar.payload["document"]
+
+
+def test_changed_tldr_page_re_embeds_its_command(run_ingest, corpus):
+    run_ingest("--no-embedding-cache")
+    (corpus / "tldr" / "pages" / "common" / "ls.md").write_text(
+        "# ls\n\n> List files.\n\n- Long listing:\n\n`ls -l`\n", encoding="utf-8"
+    )
+
+    assert run_ingest("--no-embedding-cache") == 1
+
+
+def test_removed_page_deletes_its_point(run_ingest, client, corpus):
+    run_ingest("--no-embedding-cache")
+    (corpus / "man" / "man1" / "grep.1").unlink()
+
+    assert run_ingest("--no-embedding-cache") == 0
+    assert indexed_commands(client) == {"ls", "tar"}
+    manifest = ingest.IngestManifest.load(corpus / "manifest.json")
+    assert "grep" not in manifest.documents
+    assert "man/man1/grep.1" not in manifest.files
+
+
+def test_full_rebuild_ignores_the_manifest(run_ingest):
+    run_ingest("--no-embedding-cache")
+
+    assert run_ingest("--no-embedding-cache", "--full") == 3
+
+
+def test_scan_source_changes_reports_changed_and_removed_files(corpus):
+    paths = sorted(ingest.discover_man_files(corpus / "man"))
+    commands_of = lambda path: [ingest.command_from_path(path)]  # noqa: E731
+    files, changed_paths, changed = ingest.scan_source_changes(
+        paths, ingest.IngestManifest(), commands_of
+    )
+    assert changed == {"ls", "tar", "grep"}
+    assert changed_paths == set(files)
+
+    manifest = ingest.IngestManifest(files=files)
+    (corpus / "man" / "man1" / "ls.1").write_text(man_page("ls", "list files"), encoding="utf-8")
+    (corpus / "man" / "man1" / "grep.1").unlink()
+    paths = sorted(ingest.discover_man_files(corpus / "man"))
+    _, changed_paths, changed = ingest.scan_source_changes(paths, manifest, commands_of)
+    assert changed_paths == {"man/man1/ls.1"}
+    assert changed == {"ls", "grep"}
@@ -0,0 +1,102 @@
+"""Duplicate man files (.so stubs, links, copies) collapse onto one real page each."""
+
+from __future__ import annotations
+
+import gzip
+from pathlib import Path
+from typing import Dict
+
+from conftest import man_page
+
+from app.api.linuxmancyclopedia import ingest
+from app.api.linuxmancyclopedia.ingest import (
+    IngestManifest,
+    command_aliases,
+    command_from_path,
+    resolve_man_aliases,
+)
+
+
+def write(root: Path, rel: str, text: str) -> Path:
+    path = root / "man" / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".gz":
+        path.write_bytes(gzip.compress(text.encode("utf-8")))
+    else:
+        path.write_text(text, encoding="utf-8")
+    return path
+
+
+def resolve(root: Path) -> Dict[str, str]:
+    man_root = root / "man"
+    paths = sorted(ingest.discover_man_files(man_root))
+    file_table, _, _ = ingest.scan_source_changes(
+        paths, IngestManifest(), lambda path: [command_from_path(path)]
+    )
+    return resolve_man_aliases(paths, man_root, file_table)
+
+
+def test_so_stub_points_at_the_page_it_includes(corpus: Path):
+    write(corpus, "man1/gtar.1", ".so man1/tar.1\n")
+    write(corpus, "man1/gzip.1.gz", man_page("gzip", "compress files"))
+    write(corpus, "man1/zcat.1", ".so man1/gzip.1\n")
+
+    assert resolve(corpus) == {
+        "man/man1/gtar.1": "man/man1/tar.1",
+        "man/man1/zcat.1": "man/man1/gzip.1.gz",
+    }
+
+
+def test_copies_keep_the_member_named_first_in_the_name_line(corpus: Path):
+    page = man_page("gzip", "compress files").replace("gzip \\- ", "gzip, gunzip \\- ")
+    write(corpus, "man1/gunzip.1", page)
+    write(corpus, "man1/gzip.1", page)
+
+    assert resolve(corpus) == {"man/man1/gunzip.1": "man/man1/gzip.1"}
+
+
+def test_symlinks_are_never_canonical(corpus: Path):
+    page = man_page("xz", "compress files").replace("xz \\- ", "unxz, xz \\- ")
+    write(corpus, "man1/xz.1", page)
+    (corpus / "man" / "man1" / "unxz.1").symlink_to("xz.1")
+
+    assert resolve(corpus) == {"man/man1/unxz.1": "man/man1/xz.1"}
+
+
+def test_chains_collapse_to_the_final_page(corpus: Path):
+    write(corpus, "man1/gtar.1", ".so man1/tar.1\n")
+    write(corpus, "man1/star.1", ".so man1/gtar.1\n")
+
+    assert resolve(corpus) == {
+        "man/man1/gtar.1": "man/man1/tar.1",
+        "man/man1/star.1": "man/man1/tar.1",
+    }
+
+
+def test_stubs_that_include_each_other_stay_real_pages(corpus: Path):
+    write(corpus, "man1/ping.1", ".so man1/pong.1\n")
+    write(corpus, "man1/pong.1", ".so man1/ping.1\n")
+    write(corpus, "man1/self.1", ".so man1/self.1\n")
+    write(corpus, "man1/serve.1", ".so man1/ping.1\n")
+
+    assert resolve(corpus) == {}
+
+
+def test_copies_in_other_languages_are_not_merged(corpus: Path):
+    write(corpus, "de/man1/ls.1", (corpus / "man" / "man1" / "ls.1").read_text())
+    write(corpus, "de/man1/dir.1", (corpus / "man" / "man1" / "ls.1").read_text())
+
+    assert resolve(corpus) == {"man/de/man1/dir.1": "man/de/man1/ls.1"}
+
+
+def test_command_aliases_skip_commands_with_their_own_page():
+    file_table = {
+        "man/man1/gzip.1": {"commands": ["gzip"]},
+        "man/man1/gunzip.1": {"commands": ["gunzip"], "alias_of": "man/man1/gzip.1"},
+        "man/man1/zcat.1": {"commands": ["zcat"], "alias_of": "man/man1/gzip.1"},
+        "man/man8/zcat.8": {"commands": ["zcat"]},
+        "man/man1/gone.1": {"commands": ["gone"], "alias_of": "man/man1/missing.1"},
+        "debs/xz-utils.deb": {"commands": ["xz"], "aliases": {"unxz": "xz", "xz": "xz"}},
+    }
+
+    assert command_aliases(file_table) == {"gzip": ["gunzip"], "xz": ["unxz"]}
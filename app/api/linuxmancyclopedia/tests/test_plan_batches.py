@@ -0,0 +1,67 @@
+"""Length-bucketed batches stay under the token budget; upserts keep document order."""
+
+from __future__ import annotations
+
+from qdrant_client import QdrantClient
+
+from app.api.linuxmancyclopedia import ingest
+from app.api.linuxmancyclopedia.ingest import CommandDocument, plan_batches
+
+
+def test_without_a_budget_batches_are_fixed_slices():
+    assert plan_batches(7, 3) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert plan_batches(7, 3, lengths=[1] * 7, max_batch_tokens=0) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_batches_respect_the_padded_token_budget():
+    lengths = [50, 3, 400, 7, 12, 3, 90, 45, 8, 250]
+    batches = plan_batches(len(lengths), 32, lengths, max_batch_tokens=300)
+
+    assert sorted(idx for batch in batches for idx in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert batch == sorted(batch)
+        padded = max(lengths[idx] for idx in batch) * len(batch)
+        assert padded <= 300 or len(batch) == 1
+
+
+def test_similar_lengths_share_a_batch():
+    lengths = [100, 2, 100, 2, 100, 2]
+    batches = plan_batches(len(lengths), 32, lengths, max_batch_tokens=300)
+
+    assert batches == [[1, 3, 5], [0, 2, 4]]
+
+
+def test_document_longer_than_the_budget_gets_its_own_batch():
+    batches = plan_batches(3, 32, [10, 500, 10], max_batch_tokens=100)
+
+    assert batches == [[0, 2], [1]]
+
+
+def test_bucketed_upserts_arrive_in_document_order(model, monkeypatch):
+    client = QdrantClient(":memory:")
+    ingest.ensure_collection(client, "docs", model.dim)
+    documents = [
+        CommandDocument(
+            command=f"cmd{idx}",
+            text="word " * (1 + (idx * 37) % 50),
+            languages=["en"],
+            sections=[],
+            tldr_languages=[],
+            sources=[],
+        )
+        for idx in range(40)
+    ]
+    upserted = []
+    upsert = client.upsert
+
+    def record(collection_name, points, **kwargs):
+        upserted.extend(str(point.id) for point in points)
+        return upsert(collection_name=collection_name, points=points, **kwargs)
+
+    monkeypatch.setattr(client, "upsert", record)
+    ingest.embed_and_upsert(model, client, "docs", documents, 4, max_batch_tokens=60)
+
+    assert upserted == [doc.point_id() for doc in documents]
+    stored = client.retrieve("docs", [documents[7].point_id()], with_vectors=True)[0]
+    expected = model.encode([documents[7].text])[0]
+    assert max(abs(a - b) for a, b in zip(stored.vector, expected)) < 1e-5
@@ -0,0 +1,117 @@
+"""QueryBatcher: concurrent query encodes merged into batched model calls."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from app.api.linuxmancyclopedia.example_route import InstrumentedExecutor, QueryBatcher
+
+
+class Encoder:
+    """Records the batches it is given; each text encodes to ``[len(text)]``."""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self.batches: List[List[str]] = []
+        self.error = error
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        self.batches.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+class CancellingExecutor:
+    """Executor whose call is cancelled, as on shutdown."""
+
+    async def run(self, func, *args):
+        raise asyncio.CancelledError
+
+
+def batcher(encoder: Encoder, max_batch: int, max_wait: float) -> QueryBatcher:
+    return QueryBatcher(encoder, max_batch, max_wait, InstrumentedExecutor("test", 1))
+
+
+def test_full_batches_leave_without_waiting():
+    async def scenario():
+        encoder = Encoder()
+        queries = batcher(encoder, max_batch=3, max_wait=5.0)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(queries.encode("x" * n) for n in range(1, 7)))
+        return results, encoder.batches, time.perf_counter() - start
+
+    results, batches, elapsed = asyncio.run(scenario())
+    assert results == [[float(n)] for n in range(1, 7)]
+    assert [len(batch) for batch in batches] == [3, 3]
+    assert elapsed < 1.0
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    async def scenario():
+        encoder = Encoder()
+        queries = batcher(encoder, max_batch=10, max_wait=0.05)
+        start = time.perf_counter()
+        results = await asyncio.gather(queries.encode("ls"), queries.encode("tar"))
+        return results, encoder.batches, time.perf_counter() - start, queries.stats()
+
+    results, batches, elapsed, stats = asyncio.run(scenario())
+    assert results == [[2.0], [3.0]]
+    assert batches == [["ls", "tar"]]
+    assert elapsed >= 0.05
+    assert (stats["batches"], stats["queries"], stats["mean_batch_size"]) == (1, 2, 2.0)
+
+
+def test_encode_error_reaches_every_caller_in_the_batch():
+    async def scenario():
+        encoder = Encoder(ValueError("model failed"))
+        queries = batcher(encoder, max_batch=10, max_wait=0.01)
+        results = await asyncio.gather(
+            queries.encode("ls"), queries.encode("tar"), return_exceptions=True
+        )
+        encoder.error = None
+        return results, await queries.encode("grep"), queries.stats()
+
+    results, after, stats = asyncio.run(scenario())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert after == [4.0]
+    assert (stats["batches"], stats["queries"]) == (1, 1)
+
+
+def test_cancelled_queries_are_left_out_of_the_batch():
+    async def scenario():
+        encoder = Encoder()
+        queries = batcher(encoder, max_batch=10, max_wait=0.05)
+        kept = asyncio.ensure_future(queries.encode("ls"))
+        dropped = asyncio.ensure_future(queries.encode("tar"))
+        await asyncio.sleep(0)
+        dropped.cancel()
+        return await kept, encoder.batches
+
+    result, batches = asyncio.run(scenario())
+    assert result == [2.0]
+    assert batches == [["ls"]]
+
+
+def test_queue_depth_counts_waiting_queries():
+    async def scenario():
+        queries = batcher(Encoder(), max_batch=10, max_wait=0.05)
+        waiting = [asyncio.ensure_future(queries.encode(text)) for text in ("ls", "tar")]
+        await asyncio.sleep(0)
+        depth = queries.stats()["queue_depth"]
+        await asyncio.gather(*waiting)
+        return depth, queries.stats()["queue_depth"]
+
+    assert asyncio.run(scenario()) == (2, 0)
+
+
+def test_callers_are_released_when_the_encode_is_cancelled():
+    async def scenario():
+        queries = QueryBatcher(Encoder(), 10, 0.01, CancellingExecutor())
+        await asyncio.wait_for(queries.encode("ls"), timeout=1.0)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(scenario())
@@ -0,0 +1,131 @@
+"""QueryEmbeddingCache: LRU with TTL, one computation per key in flight."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import List
+
+import pytest
+
+from app.api.linuxmancyclopedia.example_route import QueryEmbeddingCache
+
+
+class Encoder:
+    """Counts computations; each one waits until ``release`` is set."""
+
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, key: str) -> List[float]:
+        self.calls.append(key)
+        await self.release.wait()
+        return [float(len(self.calls))]
+
+
+def compute(encoder: Encoder, key: str):
+    return lambda: encoder(key)
+
+
+def test_hit_after_miss():
+    async def scenario():
+        cache, encoder = QueryEmbeddingCache(4, ttl=60), Encoder()
+        encoder.release.set()
+        first = await cache.get("ls", compute(encoder, "ls"))
+        second = await cache.get("ls", compute(encoder, "ls"))
+        return first, second, encoder.calls, cache.stats()
+
+    first, second, calls, stats = asyncio.run(scenario())
+    assert first == second == [1.0]
+    assert calls == ["ls"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_entries_expire_after_ttl():
+    async def scenario():
+        cache, encoder = QueryEmbeddingCache(4, ttl=0.05), Encoder()
+        encoder.release.set()
+        await cache.get("ls", compute(encoder, "ls"))
+        await asyncio.sleep(0.1)
+        await cache.get("ls", compute(encoder, "ls"))
+        return encoder.calls, cache.stats()
+
+    calls, stats = asyncio.run(scenario())
+    assert calls == ["ls", "ls"]
+    assert (stats["hits"], stats["misses"]) == (0, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    async def scenario():
+        cache, encoder = QueryEmbeddingCache(2, ttl=60), Encoder()
+        encoder.release.set()
+        for key in ("a", "b", "a", "c", "a", "b"):
+            await cache.get(key, compute(encoder, key))
+        return encoder.calls, cache.stats()
+
+    calls, stats = asyncio.run(scenario())
+    assert calls == ["a", "b", "c", "b"]
+    assert stats["evictions"] == 2
+    assert stats["size"] == 2
+
+
+def test_concurrent_misses_share_one_computation():
+    async def scenario():
+        cache, encoder = QueryEmbeddingCache(4, ttl=60), Encoder()
+        waiters = [asyncio.ensure_future(cache.get("ls", compute(encoder, "ls"))) for _ in range(5)]
+        await asyncio.sleep(0)
+        encoder.release.set()
+        return await asyncio.gather(*waiters), encoder.calls, cache.stats()
+
+    results, calls, stats = asyncio.run(scenario())
+    assert results == [[1.0]] * 5
+    assert calls == ["ls"]
+    assert (stats["misses"], stats["coalesced"]) == (1, 4)
+
+
+def test_cancelled_first_caller_does_not_cancel_the_computation():
+    async def scenario():
+        cache, encoder = QueryEmbeddingCache(4, ttl=60), Encoder()
+        first = asyncio.ensure_future(cache.get("ls", compute(encoder, "ls")))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(cache.get("ls", compute(encoder, "ls")))
+        await asyncio.sleep(0)
+        first.cancel()
+        encoder.release.set()
+        return await second, first.cancelled(), encoder.calls, cache.stats()["size"]
+
+    result, cancelled, calls, size = asyncio.run(scenario())
+    assert result == [1.0]
+    assert cancelled
+    assert calls == ["ls"]
+    assert size == 1
+
+
+def test_failures_are_not_cached():
+    async def scenario():
+        cache = QueryEmbeddingCache(4, ttl=60)
+
+        async def fail() -> List[float]:
+            raise RuntimeError("model unavailable")
+
+        with pytest.raises(RuntimeError):
+            await cache.get("ls", fail)
+        encoder = Encoder()
+        encoder.release.set()
+        return await cache.get("ls", compute(encoder, "ls")), cache.pending, cache.stats()
+
+    result, pending, stats = asyncio.run(scenario())
+    assert result == [1.0]
+    assert pending == {}
+    assert stats["misses"] == 2
+
+
+def test_zero_size_disables_caching():
+    async def scenario():
+        cache, encoder = QueryEmbeddingCache(0, ttl=60), Encoder()
+        encoder.release.set()
+        await cache.get("ls", compute(encoder, "ls"))
+        await cache.get("ls", compute(encoder, "ls"))
+        return encoder.calls, cache.stats()["size"]
+
+    assert asyncio.run(scenario()) == (["ls", "ls"], 0)
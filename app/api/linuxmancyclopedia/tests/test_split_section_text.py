@@ -0,0 +1,59 @@
+"""Section chunking keeps each option with its description and stays under max_chars."""
+
+from __future__ import annotations
+
+from app.api.linuxmancyclopedia.ingest import split_section_text
+
+OPTIONS = (
+    "-x, --extract\n"
+    "    Extract files from an archive.\n"
+    "-c, --create\n"
+    "    Create a new archive.\n"
+    "    Arguments name the files to add.\n"
+    "--exclude=PATTERN\n"
+    "    Skip files matching PATTERN."
+)
+
+
+def test_options_are_cut_at_flag_lines():
+    chunks = split_section_text("OPTIONS", OPTIONS, max_chars=75)
+
+    assert chunks == [
+        "-x, --extract\n    Extract files from an archive.",
+        "-c, --create\n    Create a new archive.\n    Arguments name the files to add.",
+        "--exclude=PATTERN\n    Skip files matching PATTERN.",
+    ]
+
+
+def test_short_options_share_a_chunk():
+    assert split_section_text("OPTIONS", OPTIONS, max_chars=1000) == [OPTIONS]
+
+
+def test_other_sections_are_cut_on_lines():
+    text = "-x looks like a flag\nbut this is prose\nso any line may start a chunk"
+    chunks = split_section_text("DESCRIPTION", text, max_chars=40)
+
+    assert chunks == ["-x looks like a flag\nbut this is prose", "so any line may start a chunk"]
+
+
+def test_oversized_option_is_cut_on_lines():
+    text = "-v, --verbose\n" + "\n".join(f"    detail line {n}" for n in range(6))
+    chunks = split_section_text("OPTIONS", text, max_chars=40)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert chunks[0].startswith("-v, --verbose")
+    assert [line.strip() for chunk in chunks for line in chunk.splitlines()] == [
+        line.strip() for line in text.splitlines()
+    ]
+
+
+def test_single_line_longer_than_max_chars_is_kept_whole():
+    long_line = "word " * 30
+    chunks = split_section_text("DESCRIPTION", f"short\n{long_line}\nshort", max_chars=40)
+
+    assert chunks == ["short", long_line.strip(), "short"]
+
+
+def test_blank_section_yields_no_chunks():
+    assert split_section_text("OPTIONS", "\n  \n", max_chars=40) == []
@@ -0,0 +1,131 @@
+"""Exact in-process vector search over a collection exported by ingest.
+
+An export is a directory holding the vectors as one raw float32 matrix, the
+payloads as JSON lines with a byte-offset index, and a small ``meta.json``.
+Everything is memory-mapped read-only, so worker processes on one host share
+the same page-cache pages and only touch the payloads of the hits they return.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+STORE_VERSION = 1
+VECTORS_FILE = "vectors.f32"
+PAYLOADS_FILE = "payloads.jsonl"
+OFFSETS_FILE = "offsets.u64"
+META_FILE = "meta.json"
+UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "linux-explained/vector-docs")
+
+
+def document_point_id(
+    command: str,
+    language: str | None = None,
+    section: str | None = None,
+    chunk: int | None = None,
+) -> str:
+    """Point id of a command's document, one language of it, or one section chunk.
+
+    Ingest upserts under these ids and the API fetches known commands by them,
+    in Qdrant and in exports alike.
+    """
+    if language is None:
+        key = command
+    elif section is None:
+        key = f"{command}:{language}"
+    else:
+        key = f"{command}:{language}:{section}:{chunk}"
+    return str(uuid.uuid5(UUID_NAMESPACE, key))
+
+
+def write_store(
+    directory: Path,
+    model: str,
+    ids: Sequence[str],
+    vectors: np.ndarray,
+    payloads: Sequence[Dict[str, object]],
+) -> None:
+    """Write an export, replacing ``directory`` only once it is complete.
+
+    Readers that already mapped the previous export keep their (unlinked)
+    files until they reopen.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    staging = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    vectors.tofile(staging / VECTORS_FILE)
+    offsets = [0]
+    with (staging / PAYLOADS_FILE).open("wb") as handle:
+        for payload in payloads:
+            offsets.append(offsets[-1] + handle.write(json.dumps(payload).encode("utf-8") + b"\n"))
+    np.asarray(offsets, dtype=np.uint64).tofile(staging / OFFSETS_FILE)
+    meta = {
+        "version": STORE_VERSION,
+        "model": model,
+        "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        "count": len(ids),
+        "ids": list(ids),
+        "languages": [str(payload.get("language") or "") for payload in payloads],
+    }
+    (staging / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+    retired = directory.with_name(directory.name + ".old")
+    shutil.rmtree(retired, ignore_errors=True)
+    if directory.exists():
+        directory.rename(retired)
+    staging.rename(directory)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+class VectorStore:
+    """Read-only view of an export answering exact dot-product top-k queries."""
+
+    def __init__(self, directory: Path):
+        meta = json.loads((directory / META_FILE).read_text(encoding="utf-8"))
+        if meta.get("version") != STORE_VERSION:
+            raise RuntimeError(f"Unsupported vector store version in {directory}.")
+        self.directory = directory
+        self.model = meta["model"]
+        self.dim = meta["dim"]
+        self.ids: List[str] = meta["ids"]
+        self.rows = {point_id: row for row, point_id in enumerate(self.ids)}
+        self.languages = np.asarray(meta["languages"])
+        count = meta["count"]
+        self.vectors = (
+            np.memmap(directory / VECTORS_FILE, dtype=np.float32, mode="r", shape=(count, self.dim))
+            if count
+            else np.zeros((0, self.dim), dtype=np.float32)
+        )
+        self.offsets = np.fromfile(directory / OFFSETS_FILE, dtype=np.uint64)
+        with (directory / PAYLOADS_FILE).open("rb") as handle:
+            self._payloads = (
+                mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if count else None
+            )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self, vector: Sequence[float], limit: int, languages: Sequence[str] | None = None
+    ) -> List[tuple[int, float]]:
+        """Rows and scores of the ``limit`` best matches, best first."""
+        scores = self.vectors @ np.asarray(vector, dtype=np.float32)
+        if languages:
+            scores = np.where(np.isin(self.languages, list(languages)), scores, -np.inf)
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def payload(self, row: int) -> Dict[str, object]:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._payloads[start:end])
@@ -7,6 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
 
 from app.api.linuxmancyclopedia import api as mancyclopedia
+from app.api.linuxmancyclopedia import example_route
 from app.api.clone import api as clone
 from app.api.worldclock.worldclock import api as worldclock
 from app.api.worldclock.admin.admin import api as admin
@@ -18,7 +19,8 @@ def start():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     start()
-    yield
+    async with example_route.lifespan(app):
+        yield
 
 load_dotenv()
 app = FastAPI(lifespan=lifespan)
@@ -31,6 +33,7 @@ app.add_middleware(
 )
 
 app.include_router(mancyclopedia)
+app.include_router(example_route.router)
 app.include_router(clone)
 app.include_router(worldclock)
 app.include_router(admin)
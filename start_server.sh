@@ -6,7 +6,7 @@ git pull
 python3 -m venv .venv
 . .venv/bin/activate
 pip install -r requirements.txt
-# python app/api/linuxmancyclopedia/ingest.py --device cpu
+# python -m app.api.linuxmancyclopedia.ingest --device cpu
 uvicorn app.api.main:app &
 # npm run dev
 npm run build